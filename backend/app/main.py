@@ -1,6 +1,7 @@
 import sys
 import os
 import json
+import dataclasses
 import random
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -96,6 +97,9 @@ async def root():
 async def get_player_status():
     ps = state.player_status
     if PlayerStatus is not None and not isinstance(ps, dict):
+        if dataclasses.is_dataclass(ps):
+            # slotted dataclasses have no __dict__
+            return dataclasses.asdict(ps)
         return ps.__dict__ if hasattr(ps, '__dict__') else ps
     return ps
 
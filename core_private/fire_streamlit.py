@@ -12,7 +12,17 @@ import streamlit as st
 import sys
 import os
 import json
+import dataclasses
 import datetime
+import functools
+import hashlib
+import itertools
+from collections import deque
+import io
+import atexit
+import logging
+import threading
+import traceback
 # 導入本地模組 (handle both direct execution and package import)
 try:
     from .fire_calculations import FireCalculations, check_fire_achievement
@@ -29,15 +39,28 @@ except ImportError:
         from core_private import FireCalculations
 import random
 import matplotlib.pyplot as plt
+import matplotlib.font_manager as fm
 import math
 import matplotlib.patches as patches
 from matplotlib.ticker import FuncFormatter
 from matplotlib.lines import Line2D
+from matplotlib.collections import PatchCollection
+from matplotlib.figure import Figure
 import numpy as np
 import pandas as pd
 import time
 import base64
 import requests
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; the settings cache falls back to the stdlib json module
+    orjson = None
+try:
+    import plotly.graph_objects as go
+except ImportError:
+    # Plotly is optional; the net-worth chart falls back to Matplotlib
+    go = None
 
 # 導入本地模組 (now imported at package level for Streamlit Cloud compatibility)
 def _import_models():
@@ -65,11 +88,26 @@ def _import_models():
 # Always import at module level - this should work
 PlayerStatus, InvestmentConfig, SalaryConfig, MonthlyFinancialResult = _import_models()
 
+def _monthly_result_fields() -> frozenset:
+    return frozenset(f.name for f in dataclasses.fields(MonthlyFinancialResult))
+
 # === Thin-client API configuration (keep UI, move core logic to backend) ===
 # Read from Streamlit secrets; provide safe local defaults for dev
 API_BASE_URL = st.secrets.get("API_BASE_URL", "http://localhost:8000")
 API_KEY = st.secrets.get("API_KEY", "dev-key")
 
+# Verbose "DEBUG ..." entries in the UI log are only recorded with FIRE_DEBUG=1;
+# checking the flag first also skips building the f-strings on every rerun.
+_DEBUG_LOG = os.environ.get('FIRE_DEBUG') == '1'
+
+_log = logging.getLogger(__name__)
+
+# The UI log is a bounded ring buffer so long sessions don't keep growing session_state
+_LOG_MAXLEN = 500
+
+def _new_log(entries=()):
+    return deque(entries, maxlen=_LOG_MAXLEN)
+
 def call_backend_api(endpoint: str, data: dict) -> dict:
     """POST to backend and return JSON. Raises on non-200."""
     url = f"{API_BASE_URL}{endpoint}"
@@ -85,6 +123,447 @@ def call_backend_api(endpoint: str, data: dict) -> dict:
     except Exception:
         raise RuntimeError("API returned non-JSON response")
 
+# Debounced writes to the on-disk cache file. A new tool instance is built on
+# every Streamlit rerun, so pending updates are kept at module level and merged
+# into the file at most once per _CACHE_FLUSH_INTERVAL seconds; an update that
+# lands inside the interval is written by a trailing timer (or at exit).
+_CACHE_FLUSH_INTERVAL = 2.0
+_cache_lock = threading.Lock()
+_cache_pending = {}
+_cache_last_flush = {}
+_cache_timers = {}
+# Parsed cache file contents keyed by path -> (st_mtime_ns, dict)
+_cache_mem = {}
+# Digest of the bytes last read from / written to each path, to skip no-op rewrites
+_cache_digest = {}
+
+def _read_cache_file(path: str) -> dict:
+    """Return a shallow copy of the parsed cache file, re-parsing only when its mtime changed."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        # deleted externally: forget what we last saw so the next flush recreates the file
+        _cache_mem.pop(path, None)
+        _cache_digest.pop(path, None)
+        return {}
+    hit = _cache_mem.get(path)
+    if hit is None or hit[0] != mtime:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        hit = (mtime, orjson.loads(raw) if orjson is not None else json.loads(raw))
+        _cache_mem[path] = hit
+        _cache_digest[path] = hashlib.blake2b(raw, digest_size=16).digest()
+    return dict(hit[1])
+
+def _dump_json_bytes(obj) -> bytes:
+    """Compact UTF-8 JSON; int age keys are written as strings either way."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _atomic_write_bytes(path: str, payload: bytes) -> None:
+    """Write to a temp file and swap it in, so a killed process never leaves a truncated file."""
+    tmp = path + '.tmp'
+    with open(tmp, 'wb', buffering=65536) as f:
+        f.write(payload)
+    os.replace(tmp, path)
+
+def _flush_cache_file(path: str, force: bool = False) -> bool:
+    """Merge pending updates for `path` into the cache file. Returns True if written."""
+    with _cache_lock:
+        pending = _cache_pending.get(path)
+        if not pending:
+            return False
+        now = time.monotonic()
+        wait = _CACHE_FLUSH_INTERVAL - (now - _cache_last_flush.get(path, 0.0))
+        if not force and wait > 0:
+            _schedule_trailing_flush(path, wait)
+            return False
+        cached = _read_cache_file(path)
+        cached.update(pending)
+        payload = _dump_json_bytes(cached)
+        digest = hashlib.blake2b(payload, digest_size=16).digest()
+        written = digest != _cache_digest.get(path)
+        if written:
+            _atomic_write_bytes(path, payload)
+            # we are the writer, so remember what is on disk instead of re-reading it next time.
+            # Parse the written bytes: `cached` still holds live session objects (life_planning, ...)
+            _cache_mem[path] = (os.stat(path).st_mtime_ns,
+                                orjson.loads(payload) if orjson is not None else json.loads(payload))
+            _cache_digest[path] = digest
+        del _cache_pending[path]
+        _cache_last_flush[path] = now
+        return written
+
+def _trailing_flush(path: str):
+    try:
+        _flush_cache_file(path, force=True)
+    except Exception:
+        pass
+
+def _schedule_trailing_flush(path: str, delay: float):
+    """Arm one timer per path so deferred updates reach the file without waiting for another write."""
+    timer = _cache_timers.get(path)
+    if timer is not None and timer.is_alive():
+        return
+    timer = threading.Timer(delay, _trailing_flush, args=(path,))
+    timer.daemon = True
+    _cache_timers[path] = timer
+    timer.start()
+
+def _flush_all_cache_files():
+    for path in list(_cache_pending):
+        try:
+            _flush_cache_file(path, force=True)
+        except Exception:
+            pass
+
+atexit.register(_flush_all_cache_files)
+
+class _CacheManager:
+    """Single entry point for the on-disk settings cache: in-memory view, queued updates, debounced atomic flush."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def get(self) -> dict:
+        """Current cache contents including updates not yet flushed ({} if the file is missing)."""
+        with _cache_lock:
+            view = _read_cache_file(self.path)
+            view.update(_cache_pending.get(self.path, {}))
+        return view
+
+    def update(self, **updates):
+        """Queue top-level keys to be written on the next flush."""
+        with _cache_lock:
+            _cache_pending.setdefault(self.path, {}).update(updates)
+
+    def maybe_flush(self, force: bool = False) -> bool:
+        """Write queued updates if the debounce interval elapsed (or force=True)."""
+        try:
+            return _flush_cache_file(self.path, force=force)
+        except Exception:
+            return False
+
+def _normalize_sim_keys(sim: dict) -> dict:
+    """Return simulation results keyed by int age (JSON round-trips turn keys into strings)."""
+    if not sim or not isinstance(next(iter(sim)), str):
+        return sim
+    return {int(float(k)): v for k, v in sim.items()}
+
+# per-age simulation_results fields kept as columns by _sim_columns (aligned with 'ages').
+# Balances reach tens of millions, past float32's 2**24 whole-dollar range, so they stay
+# float64; monthly/yearly flows stay far below it and are stored as float32.
+_SIM_COLUMNS = {
+    'net_worth': np.float64, 'savings': np.float64, 'stock_investment': np.float64,
+    'bond_investment': np.float64, 'cash_investment': np.float64, 'debt': np.float64,
+    'monthly_income': np.float32, 'monthly_expense': np.float32,
+    'monthly_house_payment': np.float32, 'yearly_withdrawn': np.float32,
+}
+
+# (widget key, PlayerStatus attribute, default) for the personal-settings number inputs
+_PARAM_WIDGET_FIELDS = (
+    ('param_age', 'age', 25),
+    ('param_monthly_income', 'monthly_income', 0),
+    ('param_monthly_expense', 'monthly_expense', 0),
+    ('param_savings', 'savings', 0),
+    ('param_debt', 'debt', 0),
+)
+
+# st.fragment (Streamlit >= 1.37; experimental_fragment before that) isolates a block's own reruns
+_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda f: f)
+# st.dialog (Streamlit >= 1.37; experimental_dialog in 1.34-1.36) for the clear/restart confirmations
+_dialog = getattr(st, 'dialog', None) or getattr(st, 'experimental_dialog')
+
+@functools.lru_cache(maxsize=8)
+def _board_geometry(start_age: int, end_age: int):
+    """Perimeter cell layout for an age range: (S, xs, ys, ages, faces).
+
+    xs/ys are read-only int arrays of each cell's lower-left corner; ages lists the
+    age on each cell in order (cells past the last age are blank); faces holds
+    one colour per cell.
+    """
+    ages = tuple(range(start_age, end_age + 1))
+
+    # 設定畫布 - 尺寸會根據欲顯示年齡數動態調整，以避免標籤重疊或超出邊界
+    # side_cells: 每邊的格子數 (至少12)，格子寬度/高度為1個單位
+    S = int(max(12, math.ceil((len(ages) + 4) / 4)))
+
+    # 動態計算周邊格子位置，以 S 為每邊格子數 (包含轉角)
+    # 底邊左→右，右邊下→上，頂邊右→左，左邊上→下
+    r = np.arange(1, S)
+    xs = np.concatenate([np.arange(S), np.full(S - 1, S - 1), S - 1 - r, np.zeros(S - 2, dtype=int)])
+    ys = np.concatenate([np.zeros(S, dtype=int), r, np.full(S - 1, S - 1), S - 1 - r[:-1]])
+    xs.setflags(write=False)
+    ys.setflags(write=False)
+    ages = ages[:len(xs)]
+
+    # 決定年齡帶分界 (年輕/中年/老年)
+    total_years = end_age - start_age + 1
+    if total_years > 2:
+        band1_end = int(start_age + total_years // 4)
+        band2_end = int(start_age + 2 * (total_years // 4))
+        band3_end = int(start_age + 3 * (total_years // 4))
+    else:
+        band1_end = start_age
+        band2_end = end_age
+        band3_end = end_age
+
+    # 年齡帶顏色：年輕=lightgreen，中年=lightyellow，老年=lightcoral；無年齡的格子使用中性底色
+    age_arr = np.asarray(ages)
+    band = np.searchsorted(np.array([band1_end, band2_end, band3_end]), age_arr, side='left')
+    palette = ('lightgreen', 'lightblue', 'lightyellow', 'lightcoral')
+    faces = tuple(palette[b] for b in band.tolist()) + ('whitesmoke',) * (len(xs) - len(ages))
+    return S, xs, ys, ages, faces
+
+def _draw_board_figure(scale, start_age, end_age, status, planning, fig):
+    """繪製大富翁風格的年齡棋盤 - 完全按照原始ui_components.py邏輯
+
+    status: (age, net_worth, monthly_income, monthly_expense) shown in the centre panel.
+    fig: pooled Figure that is cleared and redrawn into.
+    Returns (fig, squares) where squares maps age -> cell centre.
+    """
+    age_now, current_net, monthly_income, monthly_expense = status
+    # Ensure a CJK-capable font is selected before drawing so Chinese text doesn't render as boxes
+    preferred = None
+    try:
+        available = {f.name for f in fm.fontManager.ttflist}
+        for name in ['Noto Sans CJK TC', 'PingFang TC', 'Heiti TC', 'LiHei Pro', 'AppleGothic', 'Arial Unicode MS', 'DejaVu Sans']:
+            if name in available:
+                preferred = name
+                break
+        if preferred:
+            plt.rcParams['font.family'] = preferred
+    except Exception:
+        pass
+
+    # Slightly smaller board for streamlit layout
+    # scale: multiply the base figsize by this factor
+    fig.clf()
+    fig.set_size_inches(8 * float(scale), 8 * float(scale))
+    ax = fig.add_subplot(1, 1, 1)
+
+    S, xs, ys, ages, faces = _board_geometry(int(start_age), int(end_age))
+    ax.set_xlim(0, S)
+    ax.set_ylim(0, S)
+    ax.set_aspect('equal')
+    ax.axis('off')
+
+    # 所有周邊格子一次繪製 (單一 PatchCollection 取代逐格 add_patch)
+    rects = [patches.Rectangle((x, y), 1, 1) for x, y in zip(xs.tolist(), ys.tolist())]
+    ax.add_collection(PatchCollection(rects, facecolors=faces, edgecolors='black',
+                                      linewidths=1, alpha=0.9, match_original=False))
+
+    squares = {}
+    label_size = max(6, int(7 * (12 / S)))
+    for age, x, y in zip(ages, xs.tolist(), ys.tolist()):
+        ax.text(x + 0.5, y + 0.5, str(age), ha='center', va='center', fontsize=label_size, weight='bold')
+        squares[age] = (x + 0.5, y + 0.5)
+
+    # 在中央添加標題和目前狀態 
+    ax.text(6, 6.5, "💰 FIRE 理財規劃", ha='center', va='center', 
+            fontsize=14, weight='bold', color='darkblue', fontfamily=preferred)
+    ax.text(6, 5.9, f"目前年齡: {age_now}歲", ha='center', va='center', 
+            fontsize=11, weight='bold', fontfamily=preferred)
+    # show net worth as-is (may be negative) and color accordingly
+    ax.text(6, 5.4, f"淨資產: ${current_net:,.0f}", ha='center', va='center', 
+            fontsize=10, color='green' if current_net >= 0 else 'red', fontfamily=preferred)
+    ax.text(6, 5.0, f"月收入: ${monthly_income:,.0f}", ha='center', va='center', 
+            fontsize=9, fontfamily=preferred)
+    ax.text(6, 4.6, f"月支出: ${monthly_expense:,.0f}", ha='center', va='center', 
+            fontsize=9, fontfamily=preferred)
+
+    # 標示目前位置 
+    if age_now in squares:
+        x, y = squares[age_now]
+        circle = patches.Circle((x, y), 0.25, color='red', alpha=0.8, zorder=10)
+        ax.add_patch(circle)
+        ax.text(x, y, "👤", ha='center', va='center', fontsize=10, zorder=11, fontfamily=preferred)
+
+    # 繪製人生規劃與隨機事件標記（來自 life_planning 與 random_events）
+    try:
+        for age_key, events in (planning or {}).items():
+            try:
+                age_int = int(age_key)
+            except Exception:
+                age_int = age_key
+            if age_int in squares:
+                sx, sy = squares[age_int]
+                # draw markers for each event (small circles)
+                offset = 0
+                for ev in events:
+                    impact = ev.get('financial_impact', 0) if isinstance(ev, dict) else 0
+                    source = ev.get('source', '') if isinstance(ev, dict) else ''
+                    etype = ev.get('type', '') if isinstance(ev, dict) else ''
+                    if source == 'dice_game' or '骰' in str(etype):
+                        color = 'red' if impact < 0 else 'orange'
+                        symbol = '🎲'
+                    else:
+                        color = 'blue'
+                        symbol = '📋'
+
+                    circ = patches.Circle((sx + 0.12 + offset, sy + 0.12), 0.055, color=color, zorder=12)
+                    ax.add_patch(circ)
+                    ax.text(sx + 0.12 + offset, sy + 0.12, symbol, ha='center', va='center', fontsize=6, zorder=13, fontfamily=preferred)
+                    offset += 0.12
+    except Exception:
+        pass
+
+    ax.set_title(f"FIRE理財規劃 - 人生年齡棋盤 ({start_age}-{end_age}歲)", fontsize=12, weight='bold', pad=12, fontfamily=preferred)
+    # plt.title(f"""FIRE理財規劃 - 人生年齡棋盤
+    #             • 年輕期：努力增加本業收入，多配置市值型投資，長期投資從年輕開始。
+    #             • 中年期：薪水及家庭負擔高原期，平衡配置，兼顧成長與穩定。
+    #             • 退休前15年：轉職難度增加，增加保守型投資，降低波動風險。為退休打底。""",fontsize=8,)
+    return fig, squares
+
+def _board_planning_fingerprint(planning) -> str:
+    """Stable digest of life_planning (keys may be a mix of int and str ages)."""
+    items = sorted(((str(k), v) for k, v in (planning or {}).items()), key=lambda kv: kv[0])
+    blob = json.dumps(items, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(blob.encode('utf-8'), digest_size=16).hexdigest()
+
+# Idle board Figures reused across renders. They are plain Figure objects (not
+# registered with pyplot), so a render only needs exclusive use of one of them.
+_BOARD_FIG_POOL_SIZE = 2
+_board_fig_pool = []
+_board_fig_lock = threading.Lock()
+
+def _acquire_board_figure():
+    with _board_fig_lock:
+        if _board_fig_pool:
+            return _board_fig_pool.pop()
+    return Figure()
+
+def _release_board_figure(fig) -> None:
+    fig.clf()
+    with _board_fig_lock:
+        if len(_board_fig_pool) < _BOARD_FIG_POOL_SIZE:
+            _board_fig_pool.append(fig)
+
+# One reusable PNG encode buffer per thread (Streamlit runs each session's script on its own thread)
+_PNG_BUF_RETAIN = 256 * 1024
+_png_buf_local = threading.local()
+
+def _acquire_png_buffer() -> io.BytesIO:
+    buf = getattr(_png_buf_local, 'buf', None)
+    if buf is None:
+        return io.BytesIO()
+    _png_buf_local.buf = None
+    buf.seek(0)
+    buf.truncate(0)
+    return buf
+
+def _release_png_buffer(buf: io.BytesIO) -> None:
+    # don't pin an unusually large buffer for the life of the thread
+    if buf.tell() <= _PNG_BUF_RETAIN:
+        _png_buf_local.buf = buf
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _build_board_figure(scale, start_age, end_age, status, planning_fingerprint, _planning):
+    """Render the board once per distinct input set and return (png_bytes, squares).
+
+    _planning is not hashed by st.cache_data; planning_fingerprint stands in for it.
+    """
+    fig = _acquire_board_figure()
+    buf = _acquire_png_buffer()
+    try:
+        fig, squares = _draw_board_figure(scale, start_age, end_age, status, _planning, fig)
+        fig.savefig(buf, format='png', dpi=110, bbox_inches='tight')
+        png = buf.getvalue()
+    finally:
+        _release_board_figure(fig)
+        _release_png_buffer(buf)
+    return png, squares
+
+def _plotly_placeholder(title: str, text: str):
+    fig = go.Figure()
+    fig.add_annotation(text=text, x=0.5, y=0.5, xref='paper', yref='paper', showarrow=False, font=dict(size=14))
+    fig.update_layout(title=title, template='plotly_white', height=360,
+                      xaxis=dict(visible=False), yaxis=dict(visible=False))
+    return fig
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _build_plotly_charts(series_digest, pie, _series):
+    """Build the five analysis charts as Plotly figures (rendered client-side).
+
+    Cached on series_digest (a hash of _series, which st.cache_data does not hash) and the pie snapshot.
+    """
+    series = _series
+    ages = list(series['ages'])
+    figs = []
+
+    # 1) 淨資產成長趨勢 - 正負值分別填色
+    y = list(series['net_worths'])
+    y_pos = [v if v >= 0 else 0 for v in y]
+    y_neg = [v if v < 0 else 0 for v in y]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=ages, y=y, mode='lines+markers', name='淨資產',
+                             line=dict(color='#0000f5', width=2),
+                             hovertemplate='年齡: %{x}<br>淨資產: $%{y:,.0f}<extra></extra>'))
+    fig.add_trace(go.Scatter(x=ages, y=y_pos, mode='none', fill='tozeroy',
+                             fillcolor='rgba(0,0,245,0.12)', showlegend=False, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=ages, y=y_neg, mode='none', fill='tozeroy',
+                             fillcolor='rgba(255,107,107,0.12)', showlegend=False, hoverinfo='skip'))
+    fig.update_layout(title='淨資產成長趨勢', xaxis_title='年齡', yaxis_title='淨資產 ($)',
+                      template='plotly_white', height=360)
+    fig.update_yaxes(tickprefix='$', separatethousands=True)
+    figs.append(fig)
+
+    # 2) 月度現金流（綠=收入，紅=支出，黃=動用投資補足差）
+    inc = list(series['monthly_income'])
+    if inc:
+        exp = list(series['monthly_expense'])
+        wdr = [min(w, e) for w, e in zip(series['monthly_withdrawn'], exp)]
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=ages, y=inc, name='月收入', marker_color='#64a456', opacity=0.9))
+        fig.add_trace(go.Bar(x=ages, y=[-e for e in exp], name='月支出', marker_color='#FF6B6B', opacity=0.9))
+        fig.add_trace(go.Bar(x=ages, y=[-w for w in wdr], name='動用投資/現金補足差額', marker_color='#F4D35E', opacity=0.95))
+        fig.update_layout(title='月度現金流（綠=收入，紅=支出，黃=動用投資補足差）', barmode='overlay',
+                          xaxis_title='年齡', yaxis_title='金額 ($)', template='plotly_white', height=360)
+        fig.update_yaxes(tickprefix='$', separatethousands=True)
+    else:
+        fig = _plotly_placeholder('月度現金流', '無數據')
+    figs.append(fig)
+
+    # 3) 資產配置趨勢（成長/防禦/現金） - stacked area
+    stacks = (('成長(股票)', series['stocks'], '#0000f5'),
+              ('防禦(債券)', series['bonds'], '#77b06c'),
+              ('現金', series['cash'], '#f7eedb'))
+    if any(a + b + c > 0 for a, b, c in zip(series['stocks'], series['bonds'], series['cash'])):
+        fig = go.Figure()
+        for name, vals, color in stacks:
+            fig.add_trace(go.Scatter(x=ages, y=list(vals), name=name, mode='lines', stackgroup='alloc',
+                                     line=dict(width=0.5, color=color), fillcolor=color))
+        fig.update_layout(title='資產配置趨勢 (成長/防禦/現金)', xaxis_title='年齡', yaxis_title='金額 ($)',
+                          template='plotly_white', height=360)
+        fig.update_yaxes(tickprefix='$', separatethousands=True)
+    else:
+        fig = _plotly_placeholder('資產配置趨勢 (成長/防禦/現金)', '無投資數據')
+    figs.append(fig)
+
+    # 4) 投資組合分布（退休時）
+    if sum(pie) > 0:
+        fig = go.Figure(go.Pie(labels=['股票 (成長型)', '債券 (防禦型)', '現金 (保留)'], values=list(pie),
+                               marker=dict(colors=['#0000f5', '#77b06c', '#f7eedb']),
+                               sort=False, direction='counterclockwise', rotation=90, textinfo='percent'))
+        fig.update_layout(title='投資組合分佈（退休時）', template='plotly_white', height=360)
+    else:
+        fig = _plotly_placeholder('投資組合分佈（退休時）', '無投資數據')
+    figs.append(fig)
+
+    # 5) 房貸分析
+    debts = list(series['debts'])
+    if any(d > 0 for d in debts):
+        fig = go.Figure(go.Scatter(x=ages, y=debts, mode='lines+markers', name='房貸餘額', fill='tozeroy',
+                                   line=dict(color='#FF6B6B', width=2), fillcolor='rgba(255,107,107,0.2)'))
+        fig.update_layout(title='房貸變化趨勢', xaxis_title='年齡', yaxis_title='房貸金額 ($)',
+                          template='plotly_white', height=360)
+        fig.update_yaxes(tickprefix='$', separatethousands=True)
+    else:
+        fig = _plotly_placeholder('房貸分析', '目前沒有房貸記錄')
+    figs.append(fig)
+    return figs
+
 class StreamlitFIREPlanningTool:
     """直接轉換原始FIREPlanningTool類，保持所有原始邏輯"""
 
@@ -95,6 +574,7 @@ class StreamlitFIREPlanningTool:
         except Exception:
             base_dir = os.getcwd()
         self.cache_file = os.path.join(base_dir, "fire_settings_cache.json")
+        self._cache = _CacheManager(self.cache_file)
 
         # 初始化 session 狀態
         self.initialize_session_state()
@@ -103,10 +583,15 @@ class StreamlitFIREPlanningTool:
         self.player_status = st.session_state.get('player_status', PlayerStatus())
         self.investment_config = st.session_state.get('investment_config', InvestmentConfig())
         self.salary_config = st.session_state.get('salary_config', SalaryConfig())
-        self.life_planning = st.session_state.get('life_planning', {})
+        # same object as the session entry, so in-place edits need no write-back
+        self.life_planning = st.session_state.setdefault('life_planning', {})
         self.random_events = st.session_state.get('random_events', {})
-        self.simulation_results = st.session_state.get('simulation_results', {})
+        self.simulation_results = _normalize_sim_keys(st.session_state.get('simulation_results', {}))
         self.financial_results = st.session_state.get('financial_results', [])
+        # (results dict, {column: ndarray}) column view of simulation_results, see _sim_columns
+        self._sim_soa = None
+        # (simulation_version, player_status fields, investment_config fields) for the FIRE memo
+        self._fire_sig = None
 
     def initialize_session_state(self):
         """初始化必要的 session_state 鍵值"""
@@ -123,7 +608,7 @@ class StreamlitFIREPlanningTool:
         st.session_state.setdefault('random_events', {})
         st.session_state.setdefault('simulation_results', {})
         st.session_state.setdefault('financial_results', [])
-        st.session_state.setdefault('log_messages', [])
+        st.session_state.setdefault('log_messages', _new_log())
 
     def save_settings_to_cache(self):
         """將關鍵設定寫入本地快取檔（原地覆蓋）- 已移除檔案操作以支援多用戶"""
@@ -141,17 +626,19 @@ class StreamlitFIREPlanningTool:
         if len(st.session_state.monthly_log) > 500:
             st.session_state.monthly_log = st.session_state.monthly_log[-500:]
 
-    def log_event(self, message: str):
-        """Append a timestamped message to the UI log stored in session_state."""
+    def log_event(self, message: str, *args):
+        """Append a timestamped message to the UI log stored in session_state.
+
+        `args` are %-formatted into `message` lazily, only once the entry is kept;
+        DEBUG entries are dropped before formatting unless FIRE_DEBUG is set.
+        """
+        if not _DEBUG_LOG and message.startswith('DEBUG'):
+            return
         try:
-            if 'log_messages' not in st.session_state:
-                st.session_state.log_messages = []
+            if args:
+                message = message % args
             timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            entry = f"[{timestamp}] {message}"
-            st.session_state.log_messages.append(entry)
-            # keep length reasonable
-            if len(st.session_state.log_messages) > 1000:
-                st.session_state.log_messages = st.session_state.log_messages[-1000:]
+            self._log_deque().append(f"[{timestamp}] {message}")
         except Exception:
             # as a fallback, print to stdout so developer can see it in logs
             try:
@@ -159,11 +646,42 @@ class StreamlitFIREPlanningTool:
             except Exception:
                 pass
 
+    def log_events(self, messages):
+        """Append several messages at once: one session_state lookup, one timestamp, one deque.extend.
+
+        Messages are taken as-is (no %-formatting); DEBUG entries are dropped unless FIRE_DEBUG is set.
+        """
+        if not _DEBUG_LOG:
+            messages = [m for m in messages if not str(m).startswith('DEBUG')]
+        if not messages:
+            return
+        try:
+            timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            self._log_deque().extend(f"[{timestamp}] {m}" for m in messages)
+        except Exception:
+            try:
+                print(f"LOG_EVENT_FAILED: {len(messages)} messages")
+            except Exception:
+                pass
+
+    def _log_deque(self):
+        """The session's UI log deque (an old list-based log is converted once)."""
+        log = st.session_state.get('log_messages')
+        if not isinstance(log, deque):
+            log = st.session_state['log_messages'] = _new_log(log or ())
+        return log
+
+    def _commit_life_planning(self):
+        """Re-bind self.life_planning to the session dict if a reset swapped it out (normally a no-op)."""
+        if st.session_state.get('life_planning') is not self.life_planning:
+            self.life_planning = st.session_state.setdefault('life_planning', {})
+
     def safe_rerun(self):
         """Attempt to trigger a Streamlit rerun in a safe way.
 
         Some environments may not support rerun; fall back to setting a session flag.
         """
+        self._commit_life_planning()
         try:
             # preferred method: force Streamlit to rerun the script
             st.rerun()
@@ -175,6 +693,17 @@ class StreamlitFIREPlanningTool:
                 # last resort: no-op
                 pass
 
+    def request_simulation(self):
+        """Queue one full simulation for the next rerun.
+
+        Repeated requests before that rerun collapse into a single run: main()
+        only simulates when run_simulation_token moves past last_executed_token.
+        """
+        try:
+            st.session_state['run_simulation_token'] = st.session_state.get('run_simulation_token', 0) + 1
+        except Exception:
+            pass
+
     def _reset_session_preserve_params(self):
         """Reset session_state and in-memory state while preserving user parameters.
 
@@ -186,15 +715,16 @@ class StreamlitFIREPlanningTool:
             preserved = {}
             # Preserve a copy of the UI log so debug messages survive the clear
             try:
-                preserved['log_messages'] = list(st.session_state.get('log_messages', []))
+                preserved['log_messages'] = _new_log(st.session_state.get('log_messages', ()))
             except Exception:
-                preserved['log_messages'] = []
+                preserved['log_messages'] = _new_log()
 
             # debug: record keys before reset into preserved log
-            try:
-                preserved['log_messages'].append(f"DEBUG before_reset keys: {list(st.session_state.keys())}")
-            except Exception:
-                pass
+            if _DEBUG_LOG:
+                try:
+                    preserved['log_messages'].append(f"DEBUG before_reset keys: {list(st.session_state.keys())}")
+                except Exception:
+                    pass
 
             try:
                 ps = st.session_state.get('player_status')
@@ -235,10 +765,10 @@ class StreamlitFIREPlanningTool:
 
             # Restore preserved (log_messages first so further debug writes succeed)
             try:
-                st.session_state['log_messages'] = preserved.get('log_messages', [])
+                st.session_state['log_messages'] = preserved.get('log_messages', _new_log())
             except Exception:
                 try:
-                    st.session_state['log_messages'] = []
+                    st.session_state['log_messages'] = _new_log()
                 except Exception:
                     pass
 
@@ -251,10 +781,11 @@ class StreamlitFIREPlanningTool:
                     pass
 
             # debug: record keys after reset into persistent log
-            try:
-                st.session_state['log_messages'].append(f"DEBUG after_reset keys: {list(st.session_state.keys())}")
-            except Exception:
-                pass
+            if _DEBUG_LOG:
+                try:
+                    st.session_state['log_messages'].append(f"DEBUG after_reset keys: {list(st.session_state.keys())}")
+                except Exception:
+                    pass
 
             # Ensure important empty keys exist
             st.session_state['life_planning'] = {}
@@ -263,7 +794,7 @@ class StreamlitFIREPlanningTool:
             st.session_state['financial_results'] = []
 
             # Clear transient flags (but don't remove the preserved log)
-            for t in ['latest_dice_event', 'selected_age', 'monthly_log', 'run_simulation_now', '_post_sim_rerun', 'last_sim_error', '_request_rerun']:
+            for t in ['latest_dice_event', 'selected_age', 'monthly_log', 'run_simulation_token', 'last_executed_token', '_post_sim_rerun', 'last_sim_error', '_request_rerun']:
                 try:
                     st.session_state.pop(t, None)
                 except Exception:
@@ -272,6 +803,7 @@ class StreamlitFIREPlanningTool:
             # Mirror into in-memory attributes
             try:
                 self.player_status = st.session_state.get('player_status', PlayerStatus())
+                self._fire_sig = None
             except Exception:
                 pass
             try:
@@ -293,7 +825,7 @@ class StreamlitFIREPlanningTool:
             except Exception:
                 pass
             try:
-                self.life_planning = {}
+                self.life_planning = st.session_state['life_planning']
             except Exception:
                 pass
             try:
@@ -320,9 +852,9 @@ class StreamlitFIREPlanningTool:
         """Clear life planning, random events and simulation results (preserve UI log)."""
         try:
             # Preserve existing log
-            preserved_log = list(st.session_state.get('log_messages', []))
+            preserved_log = _new_log(st.session_state.get('log_messages', ()))
         except Exception:
-            preserved_log = []
+            preserved_log = _new_log()
 
         try:
             # Clear session-level planning and simulation data
@@ -331,7 +863,7 @@ class StreamlitFIREPlanningTool:
             st.session_state['simulation_results'] = {}
             st.session_state['financial_results'] = []
             # clear transients
-            for t in ['latest_dice_event', 'selected_age', 'monthly_log', 'run_simulation_now', '_post_sim_rerun', 'last_sim_error', '_request_rerun']:
+            for t in ['latest_dice_event', 'selected_age', 'monthly_log', 'run_simulation_token', 'last_executed_token', '_post_sim_rerun', 'last_sim_error', '_request_rerun']:
                 try:
                     st.session_state.pop(t, None)
                 except Exception:
@@ -339,16 +871,17 @@ class StreamlitFIREPlanningTool:
             # restore preserved log and append debug entry
             try:
                 st.session_state['log_messages'] = preserved_log
-                st.session_state['log_messages'].append(f"DEBUG clear_planning keys after clear: {list(st.session_state.keys())}")
+                if _DEBUG_LOG:
+                    st.session_state['log_messages'].append(f"DEBUG clear_planning keys after clear: {list(st.session_state.keys())}")
             except Exception:
                 try:
-                    st.session_state['log_messages'] = [f"DEBUG clear_planning (log restore failed)"]
+                    st.session_state['log_messages'] = _new_log([f"DEBUG clear_planning (log restore failed)"])
                 except Exception:
                     pass
 
             # mirror to instance attributes
             try:
-                self.life_planning = {}
+                self.life_planning = st.session_state['life_planning']
                 self.random_events = {}
                 self.simulation_results = {}
                 self.financial_results = []
@@ -363,6 +896,52 @@ class StreamlitFIREPlanningTool:
                 self.log_event('清除規劃失敗')
             except Exception:
                 pass
+
+    def _restart_tool(self):
+        """Reset the session (keeping user parameters) and clear planning/results from the settings cache."""
+        try:
+            self._reset_session_preserve_params()
+        except Exception:
+            try:
+                self.log_event("重新開始時重置 session 失敗")
+            except Exception:
+                pass
+
+        # ensure cache is cleared of planning/results (helper already writes initial_settings.savings=0)
+        try:
+            # copy: the cache view is shallow and shared with the in-memory file contents
+            init = dict(self._cache.get().get('initial_settings') or {})
+            init['savings'] = 0
+            if 'debt' not in init:
+                init['debt'] = getattr(getattr(self, 'player_status', None), 'debt', 0)
+            self._cache.update(life_planning={}, random_events={}, simulation_results={}, initial_settings=init)
+            self._cache.maybe_flush(force=True)
+        except Exception as e:
+            try:
+                self.log_event(f"重新開始時更新快取檔案失敗: {e}")
+            except Exception:
+                pass
+
+        try:
+            st.session_state['just_restarted'] = True
+        except Exception:
+            pass
+
+    # Confirmations run as modal dialogs: the opening click needs no session flag,
+    # and only the confirm button triggers a (full) rerun.
+    @_dialog("確認清除規劃")
+    def _confirm_clear_dialog(self):
+        st.warning("此操作將清除所有人生規劃和模擬結果")
+        if st.button("確認清除", key="toolbar_confirm_clear", type="secondary"):
+            self._clear_planning()
+            self.safe_rerun()
+
+    @_dialog("確認重新開始")
+    def _confirm_restart_dialog(self):
+        st.warning("此操作將重置所有設定到初始狀態")
+        if st.button("確認重新開始", key="toolbar_confirm_restart", type="secondary"):
+            self._restart_tool()
+            self.safe_rerun()
     
     def execute_life_planning_events_simulation(self, player, age):
         """核心邏輯已移至後端。此函式僅保留占位以維持介面穩定。"""
@@ -445,54 +1024,43 @@ class StreamlitFIREPlanningTool:
                     raise RuntimeError("無法執行模擬：本地引擎和 API 都不可用")
 
             # 處理模擬結果
-            self.simulation_results = resp.get("simulation_results", {}) or {}
-            # Normalize keys to int if they are strings
-            if self.simulation_results:
-                try:
-                    first_key = next(iter(self.simulation_results.keys()))
-                    if isinstance(first_key, str):
-                        self.simulation_results = {int(k): v for k, v in self.simulation_results.items()}
-                except Exception:
-                    pass
+            # Normalize keys to int once here so downstream lookups never need to cast
+            self.simulation_results = _normalize_sim_keys(resp.get("simulation_results", {}) or {})
+            self._sim_soa = None
+            self._fire_sig = None
             
             self.financial_results = []
+            # slotted dataclass: keep only declared fields (the backend also sends e.g. monthly_income)
+            known = _monthly_result_fields()
             for item in resp.get("financial_results", []) or []:
-                r = MonthlyFinancialResult()
-                for k, v in (item or {}).items():
-                    try:
-                        setattr(r, k, v)
-                    except Exception:
-                        pass
+                try:
+                    r = MonthlyFinancialResult(**{k: v for k, v in (item or {}).items() if k in known})
+                except Exception:
+                    r = MonthlyFinancialResult()
                 self.financial_results.append(r)
 
             st.session_state.simulation_results = self.simulation_results
             st.session_state.financial_results = self.financial_results
             try:
                 st.session_state['simulation_params_version'] = st.session_state.get('params_version')
+                # monotonically increasing stamp so derived chart data can be reused between runs
+                st.session_state['simulation_version'] = int(st.session_state.get('simulation_version', 0) or 0) + 1
+            except Exception:
+                pass
+            # precompute the 25x fallback age while the arrays are fresh
+            try:
+                st.session_state.pop('_fire_age_25x_cached', None)
+                if self.simulation_results:
+                    self._fire_age_25x()
             except Exception:
                 pass
 
-            for log_msg in resp.get("event_log", []) or []:
-                try:
-                    self.log_event(log_msg)
-                except Exception:
-                    pass
+            self.log_events(resp.get("event_log", []) or [])
 
             # 將模擬的最後結果更新到 player_status，以供左欄投資組合顯示
             try:
                 if self.simulation_results:
-                    # 確保 keys 轉換為整數進行比較
-                    try:
-                        max_year_key = max((int(k) if isinstance(k, str) else k) for k in self.simulation_results.keys())
-                    except (ValueError, TypeError):
-                        max_year_key = max(self.simulation_results.keys())
-                    
-                    # 找到對應的實際 key（可能是字符串或整數）
-                    last_year = None
-                    for k in self.simulation_results.keys():
-                        if k == max_year_key:
-                            last_year = k
-                            break
+                    last_year = max(self.simulation_results)
                     
                     if last_year is not None:
                         last_data = self.simulation_results[last_year]
@@ -515,7 +1083,6 @@ class StreamlitFIREPlanningTool:
                             self.log_event(f"⚠️ ps={ps}, last_data is dict={isinstance(last_data, dict)}")
             except Exception as e:
                 self.log_event(f"❌ 更新投資組合失敗: {str(e)}")
-                import traceback
                 self.log_event(f"❌ 錯誤追蹤: {traceback.format_exc()}")
                 pass
 
@@ -532,164 +1099,33 @@ class StreamlitFIREPlanningTool:
             return True
         except Exception as e:
             self.log_event(f"❌ 模擬過程中發生錯誤: {str(e)}")
-            import traceback
             self.log_event(f"❌ 詳細錯誤: {traceback.format_exc()}")
             return False
     
     def draw_monopoly_board_streamlit(self, scale=0.7, start_age=20, end_age=None):
-        """繪製大富翁風格的年齡棋盤 - 完全按照原始ui_components.py邏輯
+        """繪製大富翁風格的年齡棋盤，回傳 (png_bytes, squares)；相同輸入直接取用快取圖片。
         scale: multiply the base figsize by this factor (default 0.7)
         """
-        # Ensure a CJK-capable font is selected before drawing so Chinese text doesn't render as boxes
-        try:
-            import matplotlib.font_manager as fm
-            available = {f.name for f in fm.fontManager.ttflist}
-            preferred = None
-            for name in ['Noto Sans CJK TC', 'PingFang TC', 'Heiti TC', 'LiHei Pro', 'AppleGothic', 'Arial Unicode MS', 'DejaVu Sans']:
-                if name in available:
-                    preferred = name
-                    break
-            if preferred:
-                plt.rcParams['font.family'] = preferred
-        except Exception:
-            pass
-
-        # Slightly smaller board for streamlit layout
-        # scale: multiply the base figsize by this factor
-        fig, ax = plt.subplots(1, 1, figsize=(8 * float(scale), 8 * float(scale)))
-
         # 定義年齡範圍（預設20歲起，結束年齡由end_age決定，若未提供則使用investment_config.retirement_age或65作為上限）
         if end_age is None:
             try:
                 end_age = int(getattr(self.investment_config, 'retirement_age', 65))
             except Exception:
                 end_age = 65
-        ages = list(range(int(start_age), int(end_age) + 1))
-
-        # 設定畫布 - 尺寸會根據欲顯示年齡數動態調整，以避免標籤重疊或超出邊界
-        # side_cells: 每邊的格子數 (至少12)，格子寬度/高度為1個單位
-        num_ages = len(ages)
-        side_cells = max(12, math.ceil((num_ages + 4) / 4))
-        S = int(side_cells)
-        ax.set_xlim(0, S)
-        ax.set_ylim(0, S)
-        ax.set_aspect('equal')
-        ax.axis('off')
-
-        # 動態計算周邊格子位置，以 S 為每邊格子數 (包含轉角)
-        positions = []
-        # 底邊：從左到右 (0..S-1)
-        for i in range(S):
-            positions.append((i, 0))
-        # 右邊：從下往上 (1..S-1)
-        for i in range(1, S):
-            positions.append((S - 1, i))
-        # 頂邊：從右往左 (1..S-1)
-        for i in range(1, S):
-            positions.append((S - 1 - i, S - 1))
-        # 左邊：從上往下 (1..S-2)
-        for i in range(1, S - 1):
-            positions.append((0, S - 1 - i))
-
-        squares = {}
-        # 決定年齡帶分界 (年輕/中年/老年)
-        total_years = int(end_age) - int(start_age) + 1
-        if total_years > 2:
-            band1_end = int(start_age + total_years // 4)
-            band2_end = int(start_age + 2 * (total_years // 4))
-            band3_end = int(start_age + 3 * (total_years // 4))
-        else:
-            band1_end = start_age
-            band2_end = end_age
-
-        # 為所有周邊位置都畫格子，若位置有對應年齡則標上年齡與依年齡帶著色，否則使用中性底色
-        for idx, (x, y) in enumerate(positions):
-            age = ages[idx] if idx < len(ages) else None
-            if age is None:
-                face = 'whitesmoke'
-            else:
-                # 年齡帶顏色：年輕=lightgreen，中年=lightyellow，老年=lightcoral
-                if age <= band1_end:
-                    face = 'lightgreen'
-                elif age <= band2_end:
-                    face = 'lightblue'
-                elif age <= band3_end:
-                    face = 'lightyellow'
-                else:
-                    face = 'lightcoral'
-
-            rect = patches.Rectangle((x, y), 1, 1, linewidth=1,
-                                     edgecolor='black', facecolor=face, alpha=0.9)
-            ax.add_patch(rect)
-
-            if age is not None:
-                ax.text(x + 0.5, y + 0.5, str(age), ha='center', va='center', fontsize=max(6, int(7 * (12 / S))), weight='bold')
-                squares[age] = (x + 0.5, y + 0.5)
-
-        # 在中央添加標題和目前狀態 
-        ax.text(6, 6.5, "💰 FIRE 理財規劃", ha='center', va='center', 
-                fontsize=14, weight='bold', color='darkblue', fontfamily=preferred if 'preferred' in locals() and preferred else None)
-        ax.text(6, 5.9, f"目前年齡: {self.player_status.age}歲", ha='center', va='center', 
-                fontsize=11, weight='bold', fontfamily=preferred if 'preferred' in locals() and preferred else None)
-        # show net worth as-is (may be negative) and color accordingly
-        current_net = getattr(self.player_status, 'net_worth', None)
+        ps = self.player_status
+        current_net = getattr(ps, 'net_worth', None)
         if current_net is None:
             # fallback to computed sum of liquid assets if net_worth not set
             current_net = (
-                getattr(self.player_status, 'savings', 0)
-                + getattr(self.player_status, 'stock_investment', 0)
-                + getattr(self.player_status, 'bond_investment', 0)
-                + getattr(self.player_status, 'cash_investment', 0)
+                getattr(ps, 'savings', 0)
+                + getattr(ps, 'stock_investment', 0)
+                + getattr(ps, 'bond_investment', 0)
+                + getattr(ps, 'cash_investment', 0)
             )
-        ax.text(6, 5.4, f"淨資產: ${current_net:,.0f}", ha='center', va='center', 
-                fontsize=10, color='green' if current_net >= 0 else 'red', fontfamily=preferred if 'preferred' in locals() and preferred else None)
-        ax.text(6, 5.0, f"月收入: ${self.player_status.monthly_income:,.0f}", ha='center', va='center', 
-                fontsize=9, fontfamily=preferred if 'preferred' in locals() and preferred else None)
-        ax.text(6, 4.6, f"月支出: ${self.player_status.monthly_expense:,.0f}", ha='center', va='center', 
-                fontsize=9, fontfamily=preferred if 'preferred' in locals() and preferred else None)
-
-        # 標示目前位置 
-        if self.player_status.age in squares:
-            x, y = squares[self.player_status.age]
-            circle = patches.Circle((x, y), 0.25, color='red', alpha=0.8, zorder=10)
-            ax.add_patch(circle)
-            ax.text(x, y, "👤", ha='center', va='center', fontsize=10, zorder=11, fontfamily=preferred if 'preferred' in locals() and preferred else None)
-
-        # 繪製人生規劃與隨機事件標記（來自 life_planning 與 random_events）
-        try:
-            for age_key, events in (self.life_planning or {}).items():
-                try:
-                    age_int = int(age_key)
-                except Exception:
-                    age_int = age_key
-                if age_int in squares:
-                    sx, sy = squares[age_int]
-                    # draw markers for each event (small circles)
-                    offset = 0
-                    for ev in events:
-                        impact = ev.get('financial_impact', 0) if isinstance(ev, dict) else 0
-                        source = ev.get('source', '') if isinstance(ev, dict) else ''
-                        etype = ev.get('type', '') if isinstance(ev, dict) else ''
-                        if source == 'dice_game' or '骰' in str(etype):
-                            color = 'red' if impact < 0 else 'orange'
-                            symbol = '🎲'
-                        else:
-                            color = 'blue'
-                            symbol = '📋'
-
-                        circ = patches.Circle((sx + 0.12 + offset, sy + 0.12), 0.055, color=color, zorder=12)
-                        ax.add_patch(circ)
-                        ax.text(sx + 0.12 + offset, sy + 0.12, symbol, ha='center', va='center', fontsize=6, zorder=13, fontfamily=preferred if 'preferred' in locals() and preferred else None)
-                        offset += 0.12
-        except Exception:
-            pass
-
-        plt.title(f"FIRE理財規劃 - 人生年齡棋盤 ({start_age}-{end_age}歲)", fontsize=12, weight='bold', pad=12, fontfamily=preferred if 'preferred' in locals() and preferred else None)
-        # plt.title(f"""FIRE理財規劃 - 人生年齡棋盤
-        #             • 年輕期：努力增加本業收入，多配置市值型投資，長期投資從年輕開始。
-        #             • 中年期：薪水及家庭負擔高原期，平衡配置，兼顧成長與穩定。
-        #             • 退休前15年：轉職難度增加，增加保守型投資，降低波動風險。為退休打底。""",fontsize=8,)
-        return fig, squares
+        status = (ps.age, current_net, ps.monthly_income, ps.monthly_expense)
+        planning = self.life_planning
+        return _build_board_figure(float(scale), int(start_age), int(end_age), status,
+                                   _board_planning_fingerprint(planning), planning)
 
     def show_monopoly_board(self):
         """Render a clickable board image with overlay links that set ?selected_age=XX or, when matplotlib is used,
@@ -747,8 +1183,8 @@ class StreamlitFIREPlanningTool:
         # ensure a session_state value exists for board scale (default 0.7)
         if 'board_scale' not in st.session_state:
             st.session_state.board_scale = 0.7
-        fig, squares = self.draw_monopoly_board_streamlit(scale=st.session_state.board_scale)
-        st.pyplot(fig)
+        board_img, squares = self.draw_monopoly_board_streamlit(scale=st.session_state.board_scale)
+        st.image(board_img)
         # Provide a button grid for direct clicking
         # Build a grid layout similar to draw_monopoly_board
         ages = list(range(20, 66))
@@ -844,36 +1280,21 @@ class StreamlitFIREPlanningTool:
                 # Safely mutate the session-level planning dict directly so we
                 # avoid any local-copy confusion across reruns.
                 try:
-                    s_plan = st.session_state.get('life_planning') or {}
-                    s_plan.setdefault(age_key, []).append(ev)
-                    st.session_state['life_planning'] = s_plan
-                except Exception:
-                    # fallback: write via attribute access
-                    try:
-                        st.session_state.life_planning = planning
-                    except Exception:
-                        pass
-
-                # mirror into instance so board drawing and other instance methods see the update
-                try:
-                    self.life_planning = st.session_state.get('life_planning', {})
+                    st.session_state.setdefault('life_planning', {}).setdefault(age_key, []).append(ev)
                 except Exception:
                     pass
 
+                # keep the instance bound to the session dict so board drawing sees the update
+                self._commit_life_planning()
+
                 try:
                     self.log_event(f"✅ 新增規劃: {age_key}歲 - {event_type} ({ev.get('amount')})")
                 except Exception:
                     pass
                 # save to cache (write session-level planning)
                 try:
-                    if os.path.exists(self.cache_file):
-                        with open(self.cache_file, 'r', encoding='utf-8') as f:
-                            cached = json.load(f)
-                    else:
-                        cached = {}
-                    cached['life_planning'] = st.session_state.get('life_planning', {})
-                    with open(self.cache_file, 'w', encoding='utf-8') as f:
-                        json.dump(cached, f, ensure_ascii=False, indent=2)
+                    self._cache.update(life_planning=st.session_state.get('life_planning', {}))
+                    self._cache.maybe_flush(force=True)
                 except Exception:
                     pass
                 st.success(f"已在 {age_key} 歲新增：{event_type}")
@@ -922,12 +1343,7 @@ class StreamlitFIREPlanningTool:
                                     planning[age_key].pop(i)
                                     if not planning[age_key]:
                                         del planning[age_key]
-                                st.session_state.life_planning = planning
-                                # mirror into instance and log
-                                try:
-                                    self.life_planning = planning
-                                except Exception:
-                                    pass
+                                # planning is the session dict itself; nothing to write back
                                 try:
                                     self.log_event(f"🗑️ 已刪除規劃: {age}歲 第{i+1}筆")
                                 except Exception:
@@ -942,16 +1358,18 @@ class StreamlitFIREPlanningTool:
                                 try:
                                     st.session_state['action_override'] = '📋 查看規劃'
                                     st.session_state['sidebar_action'] = '📋 查看規劃'
-                                    self.log_event('DEBUG after add: set sidebar_action and action_override')
+                                    if _DEBUG_LOG:
+                                        self.log_event('DEBUG after add: set sidebar_action and action_override')
                                 except Exception:
                                     pass
-                                try:
-                                    self.log_event(f"DEBUG planning snapshot after delete: {json.dumps(planning, ensure_ascii=False)}")
-                                except Exception:
+                                if _DEBUG_LOG:
                                     try:
-                                        self.log_event(f"DEBUG planning snapshot after delete: {repr(planning)}")
+                                        self.log_event("DEBUG planning snapshot after delete: %s", json.dumps(planning, ensure_ascii=False))
                                     except Exception:
-                                        pass
+                                        try:
+                                            self.log_event("DEBUG planning snapshot after delete: %r", planning)
+                                        except Exception:
+                                            pass
     
     def show_parameter_dialog_streamlit(self):
         """顯示參數設定對話框 - 轉換原始show_parameter_dialog邏輯"""
@@ -962,31 +1380,8 @@ class StreamlitFIREPlanningTool:
             ps = st.session_state.get('player_status') or PlayerStatus()
             # Only set param_* keys if not already present (avoids overwriting
             # user-typed input when a rerun occurs due to Enter)
-            try:
-                if 'param_age' not in st.session_state:
-                    st.session_state['param_age'] = int(getattr(ps, 'age', 25))
-            except Exception:
-                pass
-            try:
-                if 'param_monthly_income' not in st.session_state:
-                    st.session_state['param_monthly_income'] = int(getattr(ps, 'monthly_income', 0))
-            except Exception:
-                pass
-            try:
-                if 'param_monthly_expense' not in st.session_state:
-                    st.session_state['param_monthly_expense'] = int(getattr(ps, 'monthly_expense', 0))
-            except Exception:
-                pass
-            try:
-                if 'param_savings' not in st.session_state:
-                    st.session_state['param_savings'] = int(getattr(ps, 'savings', 0))
-            except Exception:
-                pass
-            try:
-                if 'param_debt' not in st.session_state:
-                    st.session_state['param_debt'] = int(getattr(ps, 'debt', 0))
-            except Exception:
-                pass
+            for key, attr, default in _PARAM_WIDGET_FIELDS:
+                st.session_state.setdefault(key, int(getattr(ps, attr, default)))
             # Initialize inflation widget state from current investment_config
             try:
                 if 'param_inflation_pct' not in st.session_state:
@@ -1350,6 +1745,7 @@ class StreamlitFIREPlanningTool:
                         ic.inflation_rate = getattr(ic, 'inflation_rate', 0.03)
                     st.session_state['investment_config'] = ic
                     self.investment_config = ic
+                    self._fire_sig = None
                 except Exception:
                     pass
 
@@ -1380,9 +1776,7 @@ class StreamlitFIREPlanningTool:
                 # 讀回快取的 initial_settings 並寫入日誌，便於在 UI 中確認
                 try:
                     if os.path.exists(self.cache_file):
-                        with open(self.cache_file, 'r', encoding='utf-8') as f:
-                            cached = json.load(f)
-                        init = cached.get('initial_settings', {})
+                        init = self._cache.get().get('initial_settings', {})
                         self.log_event(f"💾 快取已寫入 initial_settings: {init}")
                 except Exception:
                     pass
@@ -1427,6 +1821,72 @@ class StreamlitFIREPlanningTool:
                 except Exception:
                     pass
     
+    def _get_chart_series(self):
+        """Return the per-age series used by the charts.
+
+        Slider drags and toolbar clicks rerun the whole script, but the chart
+        data only changes when a simulation finishes or the parameter form is
+        submitted, so the arrays are kept in session_state keyed on those stamps.
+        """
+        signature = (st.session_state.get('simulation_version'), st.session_state.get('params_version'))
+        cached = st.session_state.get('_chart_series_cache')
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        cols = self._sim_columns()
+        sv, si, bi, ci = cols['savings'], cols['stock_investment'], cols['bond_investment'], cols['cash_investment']
+        series = {
+            'ages': cols['ages'].tolist(),
+            # compute net worth from components (exclude mortgage debt)
+            'net_worths': (sv + si + bi + ci).tolist(),
+            'stocks': si.tolist(),
+            'bonds': bi.tolist(),
+            'debts': cols['debt'].tolist(),
+            'cash': (sv + ci).tolist(),
+            'monthly_income': cols['monthly_income'].tolist(),
+            'monthly_expense': (cols['monthly_expense'] + cols['monthly_house_payment']).tolist(),
+            # stored yearly_withdrawn as a monthly average (0 when absent)
+            'monthly_withdrawn': (cols['yearly_withdrawn'] / 12.0).tolist(),
+        }
+
+        # content digest so cross-session figure caches can key on the data itself
+        series['digest'] = hashlib.blake2b(json.dumps(series, sort_keys=True, default=str).encode('utf-8'), digest_size=16).hexdigest()
+        st.session_state['_chart_series_cache'] = (signature, series)
+        return series
+
+    def _sim_columns(self):
+        """Column (SoA) view of simulation_results: {'ages': int32, <_SIM_COLUMNS>: their dtype}.
+
+        Rebuilt only when simulation_results is replaced; the dict-of-dicts stays the
+        serialized form. Non-dict entries are skipped.
+        """
+        sim = self.simulation_results
+        if self._sim_soa is None or self._sim_soa[0] is not sim:
+            keys = sorted(k for k, v in sim.items() if isinstance(v, dict))
+            rows = [sim[k] for k in keys]
+            cols = {'ages': np.array(keys, dtype=np.int32)}
+            for name, dtype in _SIM_COLUMNS.items():
+                cols[name] = np.fromiter((float(r.get(name, 0) or 0) for r in rows),
+                                         dtype=dtype, count=len(rows))
+            self._sim_soa = (sim, cols)
+        return self._sim_soa[1]
+
+    def _first_age_reaching(self, target):
+        """First simulated age whose net worth reaches `target`, or None."""
+        cols = self._sim_columns()
+        reached = cols['net_worth'] >= target
+        return int(cols['ages'][np.argmax(reached)]) if reached.any() else None
+
+    def _fire_age_25x(self):
+        """First age reaching the 25x target; precomputed by run_full_simulation, recomputed if expense changed."""
+        expense = getattr(self.player_status, 'monthly_expense', 0)
+        hit = st.session_state.get('_fire_age_25x_cached')
+        if hit is not None and hit[0] == expense:
+            return hit[1]
+        first_age = self._first_age_reaching(expense * 12 * 25)
+        st.session_state['_fire_age_25x_cached'] = (expense, first_age)
+        return first_age
+
     def show_charts_streamlit(self):
         """顯示圖表分析 - 完全照搬原始show_charts邏輯"""
         st.subheader("📊 財務分析圖表")
@@ -1444,49 +1904,75 @@ class StreamlitFIREPlanningTool:
         except Exception:
             psnap_age = None
         
-        # 準備數據 - 完全照搬原始邏輯
-        ages = []
-        net_worths = []
-        incomes = []
-        expenses = []
-        stocks = []
-        bonds = []
-        debts = []
-
-        for age_key, data in sorted(self.simulation_results.items(), key=lambda x: int(x[0])):
-            # Ensure age is an int (JSON keys may be strings)
+        # 準備數據 - 只在新模擬或參數保存後重新整理
+        series = self._get_chart_series()
+        stock, bond, cash = self._portfolio_snapshot()
+
+        if go is not None:
+            # Plotly: ship the data and let the browser render; figures are cached per data digest
             try:
-                age = int(age_key)
+                figs = _build_plotly_charts(series['digest'], (stock, bond, cash), series)
+                st.plotly_chart(figs[0], use_container_width=True)
+                for i in range(1, len(figs), 2):
+                    cols = st.columns(2)
+                    with cols[0]:
+                        st.plotly_chart(figs[i], use_container_width=True)
+                    if i + 1 < len(figs):
+                        with cols[1]:
+                            st.plotly_chart(figs[i + 1], use_container_width=True)
+                return
             except Exception:
-                try:
-                    age = int(float(age_key))
-                except Exception:
-                    # skip unparseable keys
-                    continue
-            if not isinstance(data, dict):
-                # skip invalid entries
-                continue
-            ages.append(age)
-            # compute net worth from components (exclude mortgage debt)
-            sv = float(data.get('savings', 0) or 0)
-            si = float(data.get('stock_investment', 0) or 0)
-            bi = float(data.get('bond_investment', 0) or 0)
-            ci = float(data.get('cash_investment', 0) or 0)
-            nw = sv + si + bi + ci
-            net_worths.append(nw)
-            mi = float(data.get('monthly_income', 0) or 0)
-            me = float(data.get('monthly_expense', 0) or 0)
-            incomes.append(mi * 12)
-            expenses.append(me * 12)
-            stocks.append(si)
-            bonds.append(bi)
-            debts.append(float(data.get('debt', 0) or 0))
-        
+                _log.exception("Plotly charts failed; falling back to Matplotlib")
+        self._show_charts_matplotlib(series, (stock, bond, cash))
+
+    def _portfolio_snapshot(self):
+        """(stock, bond, cash) at retirement age for the portfolio pie chart."""
+        # Choose retirement-age snapshot; fallback to latest available if exact age not present
+        target_age = int(getattr(self.investment_config, 'retirement_age', 65) or 65)
+        snap = None
+        if self.simulation_results:
+            # exact retirement age if present
+            try:
+                snap = self.simulation_results.get(target_age)
+                if snap is None:
+                    # fallback to the latest age prior to retirement
+                    snap = self.simulation_results[max(self.simulation_results)]
+            except Exception:
+                snap = None
+        if snap is None and self.financial_results:
+            # fallback: last monthly record at or before retirement_age, else last overall
+            try:
+                candidates = [r for r in self.financial_results if int(getattr(r, 'age', -1)) == target_age]
+                last = candidates[-1] if candidates else self.financial_results[-1]
+                snap = {
+                    'stock_investment': float(getattr(last, 'stock_investment', 0) or 0),
+                    'bond_investment': float(getattr(last, 'bond_investment', 0) or 0),
+                    'cash_investment': float(getattr(last, 'cash_investment', 0) or 0),
+                    'savings': float(getattr(last, 'savings', 0) or 0),
+                }
+            except Exception:
+                snap = None
+
+        if isinstance(snap, dict):
+            stock = max(0.0, float(snap.get('stock_investment', 0) or 0))
+            bond = max(0.0, float(snap.get('bond_investment', 0) or 0))
+            cash = max(0.0, float(snap.get('cash_investment', 0) or 0) + float(snap.get('savings', 0) or 0))
+            return stock, bond, cash
+        return 0.0, 0.0, 0.0
+
+    def _show_charts_matplotlib(self, series, pie):
+        """Matplotlib fallback for show_charts_streamlit when Plotly is unavailable."""
+        ages = series['ages']
+        net_worths = series['net_worths']
+        stocks = series['stocks']
+        bonds = series['bonds']
+        debts = series['debts']
+        stock, bond, cash = pie
+        total = stock + bond + cash
+
         # Render all charts on the page in a compact 2-per-row layout
         # Choose an available CJK-capable font at runtime to avoid missing-glyph boxes on macOS.
         try:
-            import matplotlib.font_manager as fm
-
             candidates = [
                 'Noto Sans CJK TC', 'Noto Sans CJK JP', 'Noto Sans CJK SC', 'PingFang TC',
                 'PingFang', 'AppleGothic', 'Heiti TC', 'Microsoft JhengHei', 'SimHei',
@@ -1522,73 +2008,30 @@ class StreamlitFIREPlanningTool:
 
         figs = []
 
-        # 1) 淨資產成長趨勢 - 使用 Plotly 提供互動 hover（若不可用則回退到 Matplotlib）
-        try:
-            import plotly.graph_objects as go
-
-            # prepare arrays
-            x = list(ages)
-            y = list(net_worths)
-
-            # positive and negative areas for different fills
-            y_pos = [v if v >= 0 else 0 for v in y]
-            y_neg = [v if v < 0 else 0 for v in y]
-
-            fig_plotly = go.Figure()
-            # line trace
-            fig_plotly.add_trace(go.Scatter(x=x, y=y, mode='lines+markers', name='淨資產',
-                                            line=dict(color='#0000f5', width=2),
-                                            hovertemplate='年齡: %{x}<br>淨資產: $%{y:,.0f}<extra></extra>'))
-            # positive fill
-            fig_plotly.add_trace(go.Scatter(x=x, y=y_pos, mode='none', fill='tozeroy',
-                                            fillcolor='rgba(0,0,245,0.12)', showlegend=False))
-            # negative fill
-            fig_plotly.add_trace(go.Scatter(x=x, y=y_neg, mode='none', fill='tozeroy',
-                                            fillcolor='rgba(255,107,107,0.12)', showlegend=False))
-
-            fig_plotly.update_layout(title='淨資產成長趨勢', xaxis_title='年齡', yaxis_title='淨資產 ($)',
-                                     template='plotly_white', height=360)
-            # format y-axis to show commas and dollar sign in hover
-            fig_plotly.update_yaxes(tickprefix='$', separatethousands=True)
-
-            # render Plotly chart directly (interactive)
-            st.plotly_chart(fig_plotly, use_container_width=True)
-        except Exception:
-            # fallback to Matplotlib if Plotly not available
-            fig1, ax = plt.subplots(figsize=(6, 3.6))
-            # color matched to figures.png (bright blue)
-            net_color = '#0000f5'
-            neg_fill_color = '#FF6B6B'
-            ax.plot(ages, net_worths, color=net_color, linewidth=2, label='淨資產', marker='o')
-            ax.axhline(0, color='black', linewidth=0.8, alpha=0.7)
-            nw_arr = np.array(net_worths)
-            if len(nw_arr) > 0:
-                mask_pos = (nw_arr >= 0).tolist()
-                mask_neg = (nw_arr < 0).tolist()
-                ax.fill_between(ages, nw_arr, 0, where=mask_pos, interpolate=True, alpha=0.25, color=net_color)
-                ax.fill_between(ages, nw_arr, 0, where=mask_neg, interpolate=True, alpha=0.25, color=neg_fill_color)
-            ax.set_title('淨資產成長趨勢', fontsize=12, weight='bold')
-            ax.set_xlabel('年齡')
-            ax.set_ylabel('淨資產 ($)')
-            ax.grid(True, alpha=0.25)
-            ax.yaxis.set_major_formatter(FuncFormatter(lambda x, p: f'${x:,.0f}'))
-            figs.append(fig1)
+        # 1) 淨資產成長趨勢
+        fig1, ax = plt.subplots(figsize=(6, 3.6))
+        # color matched to figures.png (bright blue)
+        net_color = '#0000f5'
+        neg_fill_color = '#FF6B6B'
+        ax.plot(ages, net_worths, color=net_color, linewidth=2, label='淨資產', marker='o')
+        ax.axhline(0, color='black', linewidth=0.8, alpha=0.7)
+        nw_arr = np.array(net_worths)
+        if len(nw_arr) > 0:
+            mask_pos = (nw_arr >= 0).tolist()
+            mask_neg = (nw_arr < 0).tolist()
+            ax.fill_between(ages, nw_arr, 0, where=mask_pos, interpolate=True, alpha=0.25, color=net_color)
+            ax.fill_between(ages, nw_arr, 0, where=mask_neg, interpolate=True, alpha=0.25, color=neg_fill_color)
+        ax.set_title('淨資產成長趨勢', fontsize=12, weight='bold')
+        ax.set_xlabel('年齡')
+        ax.set_ylabel('淨資產 ($)')
+        ax.grid(True, alpha=0.25)
+        ax.yaxis.set_major_formatter(FuncFormatter(lambda x, p: f'${x:,.0f}'))
+        figs.append(fig1)
 
         # 2) 月度現金流（還原原始月度現金流圖）
-        monthly_surplus = []
-        monthly_income_vals = []
-        monthly_expense_vals = []
-        monthly_withdrawn_vals = []
-        for age, data in sorted(self.simulation_results.items()):
-            mi = data.get('monthly_income', 0)
-            me = data.get('monthly_expense', 0)
-            mh = data.get('monthly_house_payment', 0)
-            monthly_surplus.append(mi - me - mh)
-            monthly_income_vals.append(mi)
-            monthly_expense_vals.append(me + mh)
-            # use stored yearly_withdrawn if present (divide by 12 for monthly average), else 0
-            yw = data.get('yearly_withdrawn', 0)
-            monthly_withdrawn_vals.append(yw / 12.0 if yw else 0)
+        monthly_income_vals = series['monthly_income']
+        monthly_expense_vals = series['monthly_expense']
+        monthly_withdrawn_vals = series['monthly_withdrawn']
 
         fig2, ax = plt.subplots(figsize=(6, 3.6))
         if monthly_income_vals:
@@ -1631,9 +2074,7 @@ class StreamlitFIREPlanningTool:
         # 3) 資產配置趨勢（成長/防禦/現金） - stacked area
         growth_vals = stocks
         conservative_vals = bonds
-        cash_vals = []
-        for age, data in sorted(self.simulation_results.items()):
-            cash_vals.append(data.get('savings', 0) + data.get('cash_investment', 0))
+        cash_vals = series['cash']
 
         fig3, ax = plt.subplots(figsize=(6, 3.6))
         if any((np.array(growth_vals) + np.array(conservative_vals) + np.array(cash_vals)) > 0):
@@ -1651,55 +2092,7 @@ class StreamlitFIREPlanningTool:
             ax.set_title('資產配置趨勢 (成長/防禦/現金)', fontsize=12, weight='bold')
         figs.append(fig3)
 
-        # 4) 投資組合分布（圓餅圖，使用最後一年數據）
         fig4, ax = plt.subplots(figsize=(8, 3.6))
-        # Choose retirement-age snapshot; fallback to latest available if exact age not present
-        target_age = int(getattr(self.investment_config, 'retirement_age', 65) or 65)
-        snap = None
-        if self.simulation_results:
-            # exact retirement age if present
-            try:
-                for k, v in self.simulation_results.items():
-                    try:
-                        if int(k) == target_age:
-                            snap = v
-                            break
-                    except Exception:
-                        continue
-                if snap is None:
-                    # fallback to the latest age prior to retirement
-                    latest_age = max(int(k) for k in self.simulation_results.keys())
-                    for k, v in self.simulation_results.items():
-                        try:
-                            if int(k) == latest_age:
-                                snap = v
-                                break
-                        except Exception:
-                            continue
-            except Exception:
-                snap = None
-        if snap is None and self.financial_results:
-            # fallback: last monthly record at or before retirement_age, else last overall
-            try:
-                candidates = [r for r in self.financial_results if int(getattr(r, 'age', -1)) == target_age]
-                last = candidates[-1] if candidates else self.financial_results[-1]
-                snap = {
-                    'stock_investment': float(getattr(last, 'stock_investment', 0) or 0),
-                    'bond_investment': float(getattr(last, 'bond_investment', 0) or 0),
-                    'cash_investment': float(getattr(last, 'cash_investment', 0) or 0),
-                    'savings': float(getattr(last, 'savings', 0) or 0),
-                }
-            except Exception:
-                snap = None
-
-        if isinstance(snap, dict):
-            stock = max(0.0, float(snap.get('stock_investment', 0) or 0))
-            bond = max(0.0, float(snap.get('bond_investment', 0) or 0))
-            cash = max(0.0, float(snap.get('cash_investment', 0) or 0) + float(snap.get('savings', 0) or 0))
-            total = stock + bond + cash
-        else:
-            stock = bond = cash = total = 0.0
-
         labels = ['股票', '債券', '現金']
         colors_pie = ['#0000f5', '#77b06c', '#f7eedb']
         if total > 0:
@@ -1797,8 +2190,6 @@ class StreamlitFIREPlanningTool:
             self.life_planning[trigger_age] = []
         dice_event = {'type': '骰子事件', 'description': event_name, 'financial_impact': financial_impact, 'source': 'dice_game'}
         self.life_planning[trigger_age].append(dice_event)
-        # mirror session state
-        st.session_state.life_planning = self.life_planning
         self.log_event(f"🎲 {trigger_age}歲骰子事件：{event_name}（{financial_impact:+,}元）")
 
     def mark_event_on_board_streamlit(self, age, event_name, financial_impact, event_type='dice'):
@@ -1814,23 +2205,10 @@ class StreamlitFIREPlanningTool:
                 'source': 'dice_game' if event_type == 'dice' else 'planning'
             }
             self.life_planning[age].append(ev)
-            st.session_state.life_planning = self.life_planning
             self.log_event(f"📍 在棋盤標注事件: {age}歲 - {event_name} ({financial_impact:+,} 元)")
-            # 保存到快取（保留設定與規劃）
-            try:
-                # load existing cache if any
-                if os.path.exists(self.cache_file):
-                    with open(self.cache_file, 'r', encoding='utf-8') as f:
-                        cached = json.load(f)
-                else:
-                    cached = {}
-
-                cached['life_planning'] = self.life_planning
-                cached['random_events'] = self.random_events
-                with open(self.cache_file, 'w', encoding='utf-8') as f:
-                    json.dump(cached, f, ensure_ascii=False, indent=2)
-            except Exception:
-                pass
+            # 保存到快取（保留設定與規劃）- debounced so rapid dice rolls collapse into one write
+            self._cache.update(life_planning=self.life_planning, random_events=self.random_events)
+            self._cache.maybe_flush()
         except Exception as e:
             self.log_event(f"⚠️ 在棋盤標注事件失敗: {e}")
     
@@ -1848,6 +2226,61 @@ class StreamlitFIREPlanningTool:
             # mirror session state already performed in add_dice_event_to_planning
             return
 
+    def _investment_config_dict(self, fullsim: bool = False) -> dict:
+        """investment_config fields passed to check_fire_achievement.
+
+        By default the values are passed through as stored (main board and the UI FIRE log).
+        fullsim=True applies the 完整模擬 page's coercions: int ages, and 0/None rates
+        replaced by 0.03.
+        """
+        ic = self.investment_config
+        if fullsim:
+            return {
+                'retirement_age': int(getattr(ic, 'retirement_age', 65)),
+                'life_expectancy': int(getattr(ic, 'life_expectancy', 85)),
+                'inflation_rate': float(getattr(ic, 'inflation_rate', 0.03) or 0.03),
+                'conservative_return_rate': float(getattr(ic, 'conservative_return_rate', 0.03) or 0.03),
+            }
+        return {
+            'retirement_age': getattr(ic, 'retirement_age', 65),
+            'life_expectancy': getattr(ic, 'life_expectancy', 85),
+            'inflation_rate': getattr(ic, 'inflation_rate', 0.03),
+            'conservative_return_rate': getattr(ic, 'conservative_return_rate', 0.03),
+        }
+
+    def _player_status_dict(self) -> dict:
+        """The player_status fields check_fire_achievement reads."""
+        return {
+            'age': getattr(self.player_status, 'age', 25),
+            'monthly_expense': getattr(self.player_status, 'monthly_expense', 0),
+        }
+
+    def _fire_params_signature(self, fullsim: bool = False):
+        """Memo key for the FIRE check; the default variant is built once per rerun (reset when a simulation or settings save changes it)."""
+        if fullsim:
+            return (
+                st.session_state.get('simulation_version'),
+                tuple(self._player_status_dict().items()),
+                tuple(self._investment_config_dict(fullsim=True).items()),
+            )
+        if self._fire_sig is None:
+            self._fire_sig = (
+                st.session_state.get('simulation_version'),
+                tuple(self._player_status_dict().items()),
+                tuple(self._investment_config_dict().items()),
+            )
+        return self._fire_sig
+
+    def _cached_fire_check(self, fullsim: bool = False):
+        """check_fire_achievement memoized per session until a new simulation or different inputs."""
+        sig = self._fire_params_signature(fullsim)
+        if st.session_state.get('_fire_params_signature') == sig and '_last_fire_result' in st.session_state:
+            return st.session_state['_last_fire_result']
+        result = check_fire_achievement(self.simulation_results, dict(sig[1]), dict(sig[2]))
+        st.session_state['_last_fire_result'] = result
+        st.session_state['_fire_params_signature'] = sig
+        return result
+
     def check_fire_achievement(self):
         """
         檢查FIRE達成情況 (成長年金現值法 + 傳統25倍法則)
@@ -1855,60 +2288,197 @@ class StreamlitFIREPlanningTool:
         NOTE: 實際計算已移至 core_private/fire_calculations.py
         此方法只負責 UI 日誌輸出
         """
+        lines = []
         try:
-            # 構建傳遞給核心計算的參數
-            player_status = {
-                'age': getattr(self.player_status, 'age', 25),
-                'monthly_expense': getattr(self.player_status, 'monthly_expense', 0),
-            }
+            # 呼叫核心計算模組（參數未變時沿用上次結果）
+            result = self._cached_fire_check()
             
-            investment_config = {
-                'retirement_age': getattr(self.investment_config, 'retirement_age', 65),
-                'life_expectancy': getattr(self.investment_config, 'life_expectancy', 85),
-                'inflation_rate': getattr(self.investment_config, 'inflation_rate', 0.03),
-                'conservative_return_rate': getattr(self.investment_config, 'conservative_return_rate', 0.03),
-            }
-            
-            # 呼叫核心計算模組
-            result = check_fire_achievement(
-                simulation_results=self.simulation_results,
-                player_status=player_status,
-                investment_config=investment_config
-            )
-            
-            # 輸出結果到 UI
-            self.log_event("🏁 FIRE 達成檢查：")
+            # 輸出結果到 UI (一次寫入日誌)
+            lines.append("🏁 FIRE 達成檢查：")
             
             if result['fire_age_growing']:
-                self.log_event(f"🎯 成長年金現值法達成年齡: {result['fire_age_growing']}歲 (目標: ${result['fire_target_growing']:,.0f})")
+                lines.append(f"🎯 成長年金現值法達成年齡: {result['fire_age_growing']}歲 (目標: ${result['fire_target_growing']:,.0f})")
             else:
-                self.log_event(f"⚠️ 成長年金現值法未達成於模擬期間 (目標: ${result['fire_target_growing']:,.0f})")
+                lines.append(f"⚠️ 成長年金現值法未達成於模擬期間 (目標: ${result['fire_target_growing']:,.0f})")
 
             if result['fire_age_traditional']:
-                self.log_event(f"📌 傳統25倍法則達成年齡: {result['fire_age_traditional']}歲 (目標: ${result['fire_target_traditional']:,.0f})")
+                lines.append(f"📌 傳統25倍法則達成年齡: {result['fire_age_traditional']}歲 (目標: ${result['fire_target_traditional']:,.0f})")
             else:
-                self.log_event(f"⚠️ 傳統25倍法則未達成於模擬期間 (目標: ${result['fire_target_traditional']:,.0f})")
+                lines.append(f"⚠️ 傳統25倍法則未達成於模擬期間 (目標: ${result['fire_target_traditional']:,.0f})")
 
             # 退休年齡摘要
             if result['retirement_status']:
                 ret = result['retirement_status']
-                self.log_event(f"💰 {ret['age']}歲淨資產: ${ret['net_worth']:,.0f}")
-                self.log_event(f"💸 {ret['age']}歲年支出: ${ret['annual_expense']:,.0f}")
-                self.log_event(f"🎯 25倍年支出目標: ${ret['annual_expense'] * 25:,.0f}")
-                self.log_event(f"📈 4% 提領金額: ${ret['safe_withdrawal']:,.0f}")
+                lines.append(f"💰 {ret['age']}歲淨資產: ${ret['net_worth']:,.0f}")
+                lines.append(f"💸 {ret['age']}歲年支出: ${ret['annual_expense']:,.0f}")
+                lines.append(f"🎯 25倍年支出目標: ${ret['annual_expense'] * 25:,.0f}")
+                lines.append(f"📈 4% 提領金額: ${ret['safe_withdrawal']:,.0f}")
                 
                 if ret['annual_expense'] > 0:
                     sustainability_ratio = ret['safe_withdrawal'] / ret['annual_expense']
-                    self.log_event(f"📊 可持續性比率: {sustainability_ratio:.2f}")
+                    lines.append(f"📊 可持續性比率: {sustainability_ratio:.2f}")
 
         except Exception as e:
-            import traceback
-            self.log_event(f"❌ 計算 FIRE 達成時發生錯誤: {e}")
+            lines.append(f"❌ 計算 FIRE 達成時發生錯誤: {e}")
+            _log.exception("FIRE achievement check failed")
+        self.log_events(lines)
+
+
+    def _render_summary(self, retirement_age: int):
+        """模擬結果摘要與 FIRE 指標（主棋盤上方）。"""
+        # 在棋盤上方顯示模擬結果摘要（預設 [待模擬]）
+        st.subheader("📊 模擬結果摘要")
+        # top row: show placeholder or top metrics and a right-aligned start-simulation button
+        top_cols = st.columns([2, 2, 1])
+        if not self.simulation_results:
+            # show retirement age from user settings, but reset numeric summaries to default/待模擬
+            final_age = retirement_age
+            with top_cols[0]:
+                st.metric("最終年齡", f"{final_age}歲")
+            with top_cols[1]:
+                st.metric("最終淨資產", f"$0")
+        else:
+            # If simulation exists but was run against different params, warn the user
             try:
-                traceback.print_exc()
+                pv = st.session_state.get('params_version')
+                spv = st.session_state.get('simulation_params_version')
+                if pv and spv and pv != spv:
+                    with top_cols[0]:
+                        st.warning("注意：現有模擬基於舊參數，請重新執行模擬以取得正確結果。")
             except Exception:
                 pass
+            try:
+                # Show the user's configured retirement age as the summary '最終年齡'
+                final_age = retirement_age
+                # If we have simulation results for the retirement age, show that net worth; otherwise fall back to the last available year or player_status
+                if self.simulation_results:
+                    last_age = max(self.simulation_results.keys())
+                    final_net_worth = self.simulation_results.get(final_age, self.simulation_results.get(last_age, {})).get('net_worth', getattr(self.player_status, 'net_worth', 0))
+                else:
+                    final_net_worth = getattr(self.player_status, 'net_worth', 0)
+                with top_cols[0]:
+                    st.metric("最終年齡", f"{final_age}歲")
+                with top_cols[1]:
+                    st.metric("最終淨資產", f"${final_net_worth:,.0f}")
+            except Exception as e:
+                # if anything goes wrong preparing metrics, show placeholder
+                with top_cols[0]:
+                    st.info("[待模擬]")
+
+        # (已移除) 右上開始模擬按鈕 - 改為在棋盤上方顯示快速工具列，並在棋盤下方置中放置主要「開始模擬」按鈕
+        # show the four FIRE metrics (same compact view as 完整模擬)
+        # If we just restarted, show placeholder metrics so UI reads as '待模擬'
+        if st.session_state.get('just_restarted'):
+            try:
+                fire_target = self.player_status.monthly_expense * 12 * 25
+            except Exception:
+                fire_target = 0
+            c1, c2, c3, c4 = st.columns(4)
+            with c1:
+                st.metric("4%法則 - 首次達成年齡", "待模擬")
+            with c2:
+                st.metric("4%法則 - 目標金額", f"${fire_target:,.0f}")
+            with c3:
+                st.metric("成長年金 - 首次達成年齡", "N/A")
+            with c4:
+                st.metric("成長年金 - 目標金額", "N/A")
+            try:
+                del st.session_state['just_restarted']
+            except Exception:
+                pass
+        elif self.simulation_results:
+            try:
+                # 呼叫核心計算模組計算 FIRE 指標
+                result = self._cached_fire_check()
 
+                fire_target_traditional = result['fire_target_traditional']
+                fire_target_growing_annuity = result['fire_target_growing']
+                first_age_traditional = result['fire_age_traditional']
+                first_age_growing = result['fire_age_growing']
+
+                c1, c2, c3, c4 = st.columns(4)
+                with c1:
+                    # show first-achievement age only if it occurs on/before the configured retirement age
+                    trad_age_disp = f"{first_age_traditional}歲" if (first_age_traditional and first_age_traditional <= retirement_age) else "未達成"
+                    st.metric("4%法則 - 首次達成年齡", trad_age_disp)
+                with c2:
+                    st.metric("4%法則 - 目標金額", f"${fire_target_traditional:,.0f}")
+                with c3:
+                    grow_age_disp = f"{first_age_growing}歲" if (first_age_growing and first_age_growing <= retirement_age) else "未達成"
+                    st.metric("成長年金 - 首次達成年齡", grow_age_disp)
+                with c4:
+                    st.metric("成長年金 - 目標金額", f"${fire_target_growing_annuity:,.0f}")
+
+                # Below the metrics, show whether the configured retirement age meets each target
+                with st.expander("退休年齡達成檢查 (顯示是否在設定退休年齡達成)"):
+                    st.write(f"設定退休年齡: {retirement_age} 歲")
+                    if result['retirement_status']:
+                        ret = result['retirement_status']
+                        ret_traditional = ret['net_worth'] >= fire_target_traditional
+                        ret_growing = ret['net_worth'] >= fire_target_growing_annuity
+                        st.write(f"4%法則 在 {retirement_age} 歲是否達成: {'是' if ret_traditional else '否'}")
+                        st.write(f"成長年金 在 {retirement_age} 歲是否達成: {'是' if ret_growing else '否'}")
+                    else:
+                        st.write("無該年齡的模擬數據")
+            except Exception as e:
+                # fallback simple 25x display
+                self.log_event(f"❌ 成長年金計算失敗: {str(e)}")
+                _log.exception("FIRE calc failed")
+                try:
+                    fire_target = self.player_status.monthly_expense * 12 * 25
+                    first_age = self._fire_age_25x()
+                    fire_age = f"{first_age}歲" if first_age is not None else "未達成"
+                    c1, c2, c3, c4 = st.columns(4)
+                    with c1:
+                        st.metric("4%法則 - 達成年齡", fire_age)
+                    with c2:
+                        st.metric("4%法則 - 目標金額", f"${fire_target:,.0f}")
+                    with c3:
+                        st.metric("成長年金 - 達成年齡", "N/A")
+                    with c4:
+                        st.metric("成長年金 - 目標金額", "N/A")
+                except Exception as e:
+                    self.log_event(f"❌ 顯示模擬摘要失敗: {e}")
+
+    @_fragment
+    def _render_board_fragment(self, board_end):
+        """棋盤縮放表單 + 棋盤圖；套用縮放時只重跑這一段。"""
+        # Board scale slider (default 0.7)
+        if 'board_scale' not in st.session_state:
+            st.session_state.board_scale = 0.7
+        # slider lives in a form so dragging does not rerun the app; only 套用 applies the value
+        with st.form('board_scale_form', clear_on_submit=False):
+            col_s1, col_s2 = st.columns([3,1])
+            with col_s1:
+                st.write('調整棋盤大小')
+                bs = st.slider('棋盤縮放比例', min_value=0.4, max_value=1.2, value=float(st.session_state.board_scale), step=0.05, format="%.2f")
+            with col_s2:
+                st.write('')
+                if st.form_submit_button('套用'):
+                    st.session_state.board_scale = float(bs)
+                st.caption(f"目前: {st.session_state.board_scale:.2f}x")
+
+        board_img, squares = self.draw_monopoly_board_streamlit(scale=st.session_state.board_scale, start_age=20, end_age=board_end)
+        st.image(board_img)
+
+    def _render_charts(self):
+        """主棋盤下方的模擬圖表。"""
+        if self.simulation_results:
+            try:
+                self.show_charts_streamlit()
+            except Exception as e:
+                st.warning(f"圖表顯示失敗: {e}")
+
+    def _render_log(self):
+        """操作日誌（最後20條）。"""
+        st.subheader("📋 操作日誌")
+        log = st.session_state.get('log_messages')
+        if log:
+            log_text = "\n".join(itertools.islice(log, max(0, len(log) - 20), None))  # 顯示最後20條
+            # Provide a non-empty (but hidden) label to avoid Streamlit accessibility warnings
+            st.text_area("操作日誌內容", value=log_text, height=200, disabled=True, label_visibility="hidden")
+        else:
+            st.info("目前沒有操作記錄")
 
     def main(self):
         """主程式介面 - 完全模仿原始main_desktop.py的介面結構"""
@@ -1937,32 +2507,12 @@ class StreamlitFIREPlanningTool:
                 # mirror into instance
                 self.player_status = ps
                 # Only set widget-backed keys if they are not already present.
-                # This avoids overwriting user-typed values during a rerun.
-                try:
-                    if 'param_age' not in st.session_state:
-                        st.session_state['param_age'] = int(getattr(ps, 'age', 25))
-                except Exception:
-                    pass
-                try:
-                    if 'param_monthly_income' not in st.session_state:
-                        st.session_state['param_monthly_income'] = int(getattr(ps, 'monthly_income', 0))
-                except Exception:
-                    pass
-                try:
-                    if 'param_monthly_expense' not in st.session_state:
-                        st.session_state['param_monthly_expense'] = int(getattr(ps, 'monthly_expense', 0))
-                except Exception:
-                    pass
-                try:
-                    if 'param_savings' not in st.session_state:
-                        st.session_state['param_savings'] = int(getattr(ps, 'savings', 0))
-                except Exception:
-                    pass
-                try:
-                    if 'param_debt' not in st.session_state:
-                        st.session_state['param_debt'] = int(getattr(ps, 'debt', 0))
-                except Exception:
-                    pass
+                # This avoids overwriting user-typed values during a rerun. Done
+                # once per session; the settings page re-seeds keys it renders.
+                if not st.session_state.get('_params_mirrored'):
+                    for key, attr, default in _PARAM_WIDGET_FIELDS:
+                        st.session_state.setdefault(key, int(getattr(ps, attr, default)))
+                    st.session_state['_params_mirrored'] = True
         except Exception:
             pass
 
@@ -1990,44 +2540,40 @@ class StreamlitFIREPlanningTool:
                         pass
             elif current_action == '🔧 個人設定':
                 # prefer explicit widget keys when present (only on settings page)
-                p_age = st.session_state.get('param_age', None)
-                p_income = st.session_state.get('param_monthly_income', None)
-                p_expense = st.session_state.get('param_monthly_expense', None)
-                p_savings = st.session_state.get('param_savings', None)
-                p_debt = st.session_state.get('param_debt', None)
-                changed = False
-                ps = st.session_state.get('player_status') or PlayerStatus()
-                if p_age is not None and getattr(ps, 'age', None) != int(p_age):
-                    ps.age = int(p_age); changed = True
-                if p_income is not None and getattr(ps, 'monthly_income', None) != int(p_income):
-                    ps.monthly_income = int(p_income); changed = True
-                if p_expense is not None and getattr(ps, 'monthly_expense', None) != int(p_expense):
-                    ps.monthly_expense = int(p_expense); changed = True
-                if p_savings is not None and getattr(ps, 'savings', None) != int(p_savings):
-                    ps.savings = int(p_savings); changed = True
-                if p_debt is not None and getattr(ps, 'debt', None) != int(p_debt):
-                    ps.debt = int(p_debt); changed = True
-                if changed:
+                ps = st.session_state.get('player_status')
+                if ps is None:
+                    ps = PlayerStatus()
+                desired = {attr: int(st.session_state[key]) for key, attr, _default in _PARAM_WIDGET_FIELDS
+                           if st.session_state.get(key) is not None}
+                current = {attr: getattr(ps, attr, None) for attr in desired}
+                # one dict compare covers the common no-input rerun
+                if desired != current:
+                    if desired.get('monthly_expense') != current.get('monthly_expense'):
+                        st.session_state.pop('_fire_age_25x_cached', None)
+                    for attr, val in desired.items():
+                        setattr(ps, attr, val)
                     st.session_state['player_status'] = ps
                     self.player_status = ps
-                    try:
-                        self.log_event(f"DEBUG sync_from_params: age={ps.age}, income={ps.monthly_income}, expense={ps.monthly_expense}")
-                    except Exception:
-                        pass
+                    self._fire_sig = None
+                    self.log_event("DEBUG sync_from_params: age=%s, income=%s, expense=%s", ps.age, ps.monthly_income, ps.monthly_expense)
         except Exception:
             pass
 
-        # Debug: record current navigation state and life_planning keys
-        try:
-            self.log_event(f"DEBUG run start: sidebar_action={st.session_state.get('sidebar_action')}, life_planning_keys={list(st.session_state.get('life_planning', {}).keys())}")
-        except Exception:
-            pass
+        self._commit_life_planning()
 
-        # Additional diagnostic info to help trace form submit / rerun behavior
-        try:
-            self.log_event(f"DEBUG params_saved={st.session_state.get('params_saved', False)}, action_override={st.session_state.get('action_override', None)}, param_monthly_income={st.session_state.get('param_monthly_income', None)}")
-        except Exception:
-            pass
+        if _DEBUG_LOG:
+            # Debug: record current navigation state and life_planning keys
+            try:
+                self.log_event("DEBUG run start: sidebar_action=%s, life_planning_keys=%s", st.session_state.get('sidebar_action'), sorted(st.session_state.get('life_planning', {}), key=int))
+            except Exception:
+                pass
+
+            # Additional diagnostic info to help trace form submit / rerun behavior
+            try:
+                self.log_event("DEBUG params_saved=%s, action_override=%s, param_monthly_income=%s",
+                               st.session_state.get('params_saved', False), st.session_state.get('action_override', None), st.session_state.get('param_monthly_income', None))
+            except Exception:
+                pass
 
         # Lightweight top navigation: Home button only (settings/help relocated to toolbar)
         try:
@@ -2051,22 +2597,19 @@ class StreamlitFIREPlanningTool:
             sess_sim = st.session_state.get('simulation_results', {}) or {}
             if sess_sim:
                 try:
-                    first_key = next(iter(sess_sim.keys()))
-                    if isinstance(first_key, str):
-                        normalized = {int(k): v for k, v in sess_sim.items()}
-                    else:
-                        normalized = dict(sess_sim)
+                    normalized = _normalize_sim_keys(sess_sim)
                 except Exception:
                     normalized = dict(sess_sim)
 
-                # Mirror into instance and session_state
+                # Mirror into instance; session_state is only rewritten when keys
+                # actually needed normalizing, so later reruns take the fast path
                 self.simulation_results = normalized
                 self.financial_results = st.session_state.get('financial_results', []) or []
-                try:
-                    st.session_state['simulation_results'] = self.simulation_results
-                    st.session_state['financial_results'] = self.financial_results
-                except Exception:
-                    pass
+                if normalized is not sess_sim:
+                    try:
+                        st.session_state['simulation_results'] = normalized
+                    except Exception:
+                        pass
 
                 # If there are real results, clear any previous simulation error
                 try:
@@ -2083,8 +2626,11 @@ class StreamlitFIREPlanningTool:
         except Exception:
             pass
 
-        # If a start simulation was requested in the previous run, execute it now
-        if st.session_state.get('run_simulation_now'):
+        # If a start simulation was requested in the previous run, execute it now.
+        # Mark the token as executed up front so a failed run isn't retried on every rerun.
+        sim_token = st.session_state.get('run_simulation_token', 0)
+        if sim_token != st.session_state.get('last_executed_token', 0):
+            st.session_state['last_executed_token'] = sim_token
             with st.spinner("執行模擬中..."):
                 ok = self.run_full_simulation()
             if ok:
@@ -2124,11 +2670,6 @@ class StreamlitFIREPlanningTool:
                     st.session_state['last_sim_error'] = 'run_full_simulation returned False'
                 except Exception:
                     pass
-            # clear the request so it won't run again automatically
-            try:
-                st.session_state['run_simulation_now'] = False
-            except Exception:
-                pass
         
         # Ensure instance mirrors session_state after any parameter updates so
         # UI reads are consistent.
@@ -2138,31 +2679,42 @@ class StreamlitFIREPlanningTool:
                 self.player_status = ss_ps
         except Exception:
             pass
-        try:
-            self.log_event(f"DEBUG sidebar sync: session_age={getattr(st.session_state.get('player_status', None), 'age', None)}, instance_age={getattr(self.player_status, 'age', None)}")
-        except Exception:
-            pass
+        if _DEBUG_LOG:
+            try:
+                self.log_event("DEBUG sidebar sync: session_age=%s, instance_age=%s",
+                               getattr(st.session_state.get('player_status', None), 'age', None), getattr(self.player_status, 'age', None))
+            except Exception:
+                pass
+
+        # investment_config is stable for the rest of this rerun; coerce it once
+        retirement_age = int(getattr(self.investment_config, 'retirement_age', 65) or 65)
 
         # 側邊欄 - 模仿原始左側狀態面板
         with st.sidebar:
-            retirement_age = int(getattr(self.investment_config, 'retirement_age', 65) or 65)
-            sim_raw = st.session_state.get('simulation_results', {})
-            sim = {int(k) if isinstance(k, str) else k: v for k, v in sim_raw.items()}
-            data = sim.get(retirement_age)
-            if not data and sim:
-                last_year = max(sim.keys())
-                data = sim.get(last_year, {})
-            if not isinstance(data, dict):
-                data = {}
+            # keys are normalized to int wherever results are stored
+            sim = st.session_state.get('simulation_results', {}) or {}
+            # panel values only change with a new simulation, a restart or a new retirement age
+            sig = (st.session_state.get('simulation_version'), retirement_age, len(sim))
+            panel = st.session_state.get('_sidebar_cache')
+            if st.session_state.get('_sidebar_sig') != sig or panel is None:
+                data = sim.get(retirement_age)
+                if not data and sim:
+                    data = sim.get(max(sim), {})
+                if not isinstance(data, dict):
+                    data = {}
+                panel = {k: f"${float(data.get(k, 0) or 0):,.0f}" for k in
+                         ('net_worth', 'stock_investment', 'bond_investment', 'cash_investment', 'real_estate_investment')}
+                st.session_state['_sidebar_cache'] = panel
+                st.session_state['_sidebar_sig'] = sig
             st.header("💰 個人財務狀況")
             st.subheader("基本信息")
             st.write(f"**年齡**: {retirement_age}歲（退休年齡）")
-            st.write(f"**淨資產**: ${data.get('net_worth', 0):,.0f}")
+            st.write(f"**淨資產**: {panel['net_worth']}")
             st.subheader("投資組合（退休時）")
-            st.write(f"**股票**: ${data.get('stock_investment', 0):,.0f}")
-            st.write(f"**債券**: ${data.get('bond_investment', 0):,.0f}")
-            st.write(f"**現金**: ${data.get('cash_investment', 0):,.0f}")
-            st.write(f"**房地產**: ${data.get('real_estate_investment', 0):,.0f}")
+            st.write(f"**股票**: {panel['stock_investment']}")
+            st.write(f"**債券**: {panel['bond_investment']}")
+            st.write(f"**現金**: {panel['cash_investment']}")
+            st.write(f"**房地產**: {panel['real_estate_investment']}")
  
             
         
@@ -2192,162 +2744,10 @@ class StreamlitFIREPlanningTool:
 
         # 主要內容區域 - 完全模仿原始右側面板
         if action == "🏠 主棋盤":
-            # 在棋盤上方顯示模擬結果摘要（預設 [待模擬]）
-            st.subheader("📊 模擬結果摘要")
-            # Debug indicator: always show counts so user can see whether results were
-            # detected by the instance and session_state (temporary, safe to keep)
-            try:
-                sess_len = len(st.session_state.get('simulation_results', {}) or {})
-            except Exception:
-                sess_len = 'err'
-            try:
-                inst_len = len(self.simulation_results) if getattr(self, 'simulation_results', None) is not None else 'err'
-            except Exception:
-                inst_len = 'err'
-            # st.caption(f"DEBUG: instance results={inst_len}  | session results={sess_len}")
-            # top row: show placeholder or top metrics and a right-aligned start-simulation button
-            top_cols = st.columns([2, 2, 1])
-            if not self.simulation_results:
-                # show retirement age from user settings, but reset numeric summaries to default/待模擬
-                try:
-                    retirement_age = int(getattr(self.investment_config, 'retirement_age', 65))
-                except Exception:
-                    retirement_age = 65
-                final_age = retirement_age
-                with top_cols[0]:
-                    st.metric("最終年齡", f"{final_age}歲")
-                with top_cols[1]:
-                    st.metric("最終淨資產", f"$0")
-            else:
-                # If simulation exists but was run against different params, warn the user
-                try:
-                    pv = st.session_state.get('params_version')
-                    spv = st.session_state.get('simulation_params_version')
-                    if pv and spv and pv != spv:
-                        with top_cols[0]:
-                            st.warning("注意：現有模擬基於舊參數，請重新執行模擬以取得正確結果。")
-                except Exception:
-                    pass
-                try:
-                    # Show the user's configured retirement age as the summary '最終年齡'
-                    retirement_age = int(getattr(self.investment_config, 'retirement_age', 65))
-                    final_age = retirement_age
-                    # If we have simulation results for the retirement age, show that net worth; otherwise fall back to the last available year or player_status
-                    if self.simulation_results:
-                        last_age = max(self.simulation_results.keys())
-                        final_net_worth = self.simulation_results.get(final_age, self.simulation_results.get(last_age, {})).get('net_worth', getattr(self.player_status, 'net_worth', 0))
-                    else:
-                        final_net_worth = getattr(self.player_status, 'net_worth', 0)
-                    with top_cols[0]:
-                        st.metric("最終年齡", f"{final_age}歲")
-                    with top_cols[1]:
-                        st.metric("最終淨資產", f"${final_net_worth:,.0f}")
-                except Exception as e:
-                    # if anything goes wrong preparing metrics, show placeholder
-                    with top_cols[0]:
-                        st.info("[待模擬]")
-
-            # (已移除) 右上開始模擬按鈕 - 改為在棋盤上方顯示快速工具列，並在棋盤下方置中放置主要「開始模擬」按鈕
-            # show the four FIRE metrics (same compact view as 完整模擬)
-            # If we just restarted, show placeholder metrics so UI reads as '待模擬'
-            if st.session_state.get('just_restarted'):
-                try:
-                    fire_target = self.player_status.monthly_expense * 12 * 25
-                except Exception:
-                    fire_target = 0
-                c1, c2, c3, c4 = st.columns(4)
-                with c1:
-                    st.metric("4%法則 - 首次達成年齡", "待模擬")
-                with c2:
-                    st.metric("4%法則 - 目標金額", f"${fire_target:,.0f}")
-                with c3:
-                    st.metric("成長年金 - 首次達成年齡", "N/A")
-                with c4:
-                    st.metric("成長年金 - 目標金額", "N/A")
-                try:
-                    del st.session_state['just_restarted']
-                except Exception:
-                    pass
-            elif self.simulation_results:
-                try:
-                    # 呼叫核心計算模組計算 FIRE 指標
-                    player_status = {
-                        'age': getattr(self.player_status, 'age', 25),
-                        'monthly_expense': getattr(self.player_status, 'monthly_expense', 0),
-                    }
-                    
-                    investment_config = {
-                        'retirement_age': getattr(self.investment_config, 'retirement_age', 65),
-                        'life_expectancy': getattr(self.investment_config, 'life_expectancy', 85),
-                        'inflation_rate': getattr(self.investment_config, 'inflation_rate', 0.03),
-                        'conservative_return_rate': getattr(self.investment_config, 'conservative_return_rate', 0.03),
-                    }
-                    
-                    result = check_fire_achievement(
-                        self.simulation_results,
-                        player_status,
-                        investment_config
-                    )
-
-                    retirement_age = investment_config['retirement_age']
-                    fire_target_traditional = result['fire_target_traditional']
-                    fire_target_growing_annuity = result['fire_target_growing']
-                    first_age_traditional = result['fire_age_traditional']
-                    first_age_growing = result['fire_age_growing']
-
-                    c1, c2, c3, c4 = st.columns(4)
-                    with c1:
-                        # show first-achievement age only if it occurs on/before the configured retirement age
-                        trad_age_disp = f"{first_age_traditional}歲" if (first_age_traditional and first_age_traditional <= retirement_age) else "未達成"
-                        st.metric("4%法則 - 首次達成年齡", trad_age_disp)
-                    with c2:
-                        st.metric("4%法則 - 目標金額", f"${fire_target_traditional:,.0f}")
-                    with c3:
-                        grow_age_disp = f"{first_age_growing}歲" if (first_age_growing and first_age_growing <= retirement_age) else "未達成"
-                        st.metric("成長年金 - 首次達成年齡", grow_age_disp)
-                    with c4:
-                        st.metric("成長年金 - 目標金額", f"${fire_target_growing_annuity:,.0f}")
-
-                    # Below the metrics, show whether the configured retirement age meets each target
-                    with st.expander("退休年齡達成檢查 (顯示是否在設定退休年齡達成)"):
-                        st.write(f"設定退休年齡: {retirement_age} 歲")
-                        if result['retirement_status']:
-                            ret = result['retirement_status']
-                            ret_traditional = ret['net_worth'] >= fire_target_traditional
-                            ret_growing = ret['net_worth'] >= fire_target_growing_annuity
-                            st.write(f"4%法則 在 {retirement_age} 歲是否達成: {'是' if ret_traditional else '否'}")
-                            st.write(f"成長年金 在 {retirement_age} 歲是否達成: {'是' if ret_growing else '否'}")
-                        else:
-                            st.write("無該年齡的模擬數據")
-                except Exception as e:
-                    # fallback simple 25x display
-                    import traceback
-                    self.log_event(f"❌ 成長年金計算失敗: {str(e)}")
-                    try:
-                        traceback.print_exc()
-                    except Exception:
-                        pass
-                    try:
-                        fire_target = self.player_status.monthly_expense * 12 * 25
-                        fire_age = "未達成"
-                        for age, data in sorted(self.simulation_results.items()):
-                            if data['net_worth'] >= fire_target:
-                                fire_age = f"{age}歲"
-                                break
-                        c1, c2, c3, c4 = st.columns(4)
-                        with c1:
-                            st.metric("4%法則 - 達成年齡", fire_age)
-                        with c2:
-                            st.metric("4%法則 - 目標金額", f"${fire_target:,.0f}")
-                        with c3:
-                            st.metric("成長年金 - 達成年齡", "N/A")
-                        with c4:
-                            st.metric("成長年金 - 目標金額", "N/A")
-                    except Exception as e:
-                        self.log_event(f"❌ 顯示模擬摘要失敗: {e}")
+            self._render_summary(retirement_age)
 
             # 顯示大富翁棋盤 - 縮小約10%
-            board_end = int(getattr(self.investment_config, 'retirement_age', 65))
+            board_end = retirement_age
             st.subheader(f"🎯 FIRE理財規劃棋盤 (20-{board_end}歲)")
             # If a dice event was just created, show a highlighted banner similar to the 'confirm' flows
             latest = st.session_state.get('latest_dice_event')
@@ -2398,47 +2798,22 @@ class StreamlitFIREPlanningTool:
                     try:
                         st.session_state['action_override'] = '📋 查看規劃'
                         st.session_state['sidebar_action'] = '📋 查看規劃'
-                        self.log_event('DEBUG toolbar: open planning')
+                        if _DEBUG_LOG:
+                            self.log_event('DEBUG toolbar: open planning')
                     except Exception:
                         pass
                     try:
                         self.safe_rerun()
                     except Exception:
                         pass
-                # Use session flag for confirm to avoid nested-button races
                 if st.button("🗑️ 清除規劃", key="toolbar_clear", use_container_width=True):
-                    # toggle the confirmation panel so clicking again will collapse it
-                    st.session_state['confirm_clear'] = not st.session_state.get('confirm_clear', False)
-
-                if st.session_state.get('confirm_clear'):
-                    st.warning("此操作將清除所有人生規劃和模擬結果")
-                    if st.button("確認清除", key="toolbar_confirm_clear", type="secondary"):
-                        try:
-                            self._clear_planning()
-                        except Exception:
-                            try:
-                                self.log_event('清除規劃失敗')
-                            except Exception:
-                                pass
-                        try:
-                            st.session_state.pop('confirm_clear', None)
-                        except Exception:
-                            pass
-                        st.success("✅ 已清除所有規劃")
-                        try:
-                            self.safe_rerun()
-                        except Exception:
-                            pass
-                        return
+                    self._confirm_clear_dialog()
             with tbc3:
 
                 # keep the start button at the right-most column so it appears on same row as restart
                 if st.button("🚀 開始模擬", key="toolbar_start_right", type="primary", use_container_width=True):
                     # request simulation run on next rerun and trigger rerun now
-                    try:
-                        st.session_state['run_simulation_now'] = True
-                    except Exception:
-                        pass
+                    self.request_simulation()
                     try:
                         self.safe_rerun()
                     except Exception:
@@ -2446,61 +2821,8 @@ class StreamlitFIREPlanningTool:
                 # If a recent simulation error exists, show it here
                 if st.session_state.get('last_sim_error'):
                     st.error(f"最近模擬錯誤: {st.session_state.get('last_sim_error')}")
-                # Use a session flag for confirmation to avoid nested-button race conditions
                 if st.button("🔄 重新開始", key="toolbar_restart", use_container_width=True):
-                    # toggle the confirmation panel so clicking again will collapse it
-                    st.session_state['confirm_restart'] = not st.session_state.get('confirm_restart', False)
-
-                if st.session_state.get('confirm_restart'):
-                    st.warning("此操作將重置所有設定到初始狀態")
-                    if st.button("確認重新開始", key="toolbar_confirm_restart", type="secondary"):
-                        try:
-                            self._reset_session_preserve_params()
-                        except Exception:
-                            try:
-                                self.log_event("重新開始時重置 session 失敗")
-                            except Exception:
-                                pass
-
-                        # ensure cache is cleared of planning/results (helper already writes initial_settings.savings=0)
-                        try:
-                            if os.path.exists(self.cache_file):
-                                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                                    cached = json.load(f)
-                            else:
-                                cached = {}
-                            cached['life_planning'] = {}
-                            cached['random_events'] = {}
-                            cached['simulation_results'] = {}
-                            if 'initial_settings' not in cached:
-                                cached['initial_settings'] = {}
-                            cached['initial_settings']['savings'] = 0
-                            if 'debt' not in cached['initial_settings']:
-                                cached['initial_settings']['debt'] = getattr(getattr(self, 'player_status', None), 'debt', 0)
-                            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                                json.dump(cached, f, ensure_ascii=False, indent=2)
-                        except Exception as e:
-                            try:
-                                self.log_event(f"重新開始時更新快取檔案失敗: {e}")
-                            except Exception:
-                                pass
-
-                        # clear confirmation flag and mark restart
-                        try:
-                            st.session_state.pop('confirm_restart', None)
-                        except Exception:
-                            pass
-
-                        st.success("✅ 工具已重新開始")
-                        try:
-                            st.session_state['just_restarted'] = True
-                        except Exception:
-                            pass
-                        try:
-                            self.safe_rerun()
-                        except Exception:
-                            pass
-                        return
+                    self._confirm_restart_dialog()
             # right-most area: place the primary start button aligned with restart (方案2 要求)
             with tbc4:
                 # 使用說明 按鈕放在右側工具列
@@ -2513,36 +2835,13 @@ class StreamlitFIREPlanningTool:
                         self.safe_rerun()
                     except Exception:
                         pass
-            # Board scale slider (default 0.7)
-            if 'board_scale' not in st.session_state:
-                st.session_state.board_scale = 0.7
-            col_s1, col_s2 = st.columns([3,1])
-            with col_s1:
-                st.write('調整棋盤大小')
-                bs = st.slider('棋盤縮放比例', min_value=0.4, max_value=1.2, value=float(st.session_state.board_scale), step=0.05, format="%.2f")
-                st.session_state.board_scale = float(bs)
-            with col_s2:
-                st.write('')
-                st.caption(f"目前: {st.session_state.board_scale:.2f}x")
-
-            fig, squares = self.draw_monopoly_board_streamlit(scale=st.session_state.board_scale, start_age=20, end_age=board_end)
-            st.pyplot(fig)
+            self._render_board_fragment(board_end)
 
             # 若已有模擬結果，顯示圖表（放在主棋盤下方）
-            if self.simulation_results:
-                try:
-                    self.show_charts_streamlit()
-                except Exception as e:
-                    st.warning(f"圖表顯示失敗: {e}")
+            self._render_charts()
             
             # 日誌顯示
-            st.subheader("📋 操作日誌")
-            if 'log_messages' in st.session_state and st.session_state.log_messages:
-                log_text = "\n".join(st.session_state.log_messages[-20:])  # 顯示最後20條
-                # Provide a non-empty (but hidden) label to avoid Streamlit accessibility warnings
-                st.text_area("操作日誌內容", value=log_text, height=200, disabled=True, label_visibility="hidden")
-            else:
-                st.info("目前沒有操作記錄")
+            self._render_log()
 
             # # Debug: show a snapshot of key runtime state for diagnosis
             # with st.expander("🔧 調試：顯示目前狀態快照"):
@@ -2588,18 +2887,15 @@ class StreamlitFIREPlanningTool:
             st.subheader("🚀 完整FIRE退休模擬")
             
             if st.button("開始模擬", type="primary"):
-                try:
-                    st.session_state['run_simulation_now'] = True
-                except Exception:
-                    pass
+                self.request_simulation()
             
             # 顯示模擬結果
             if self.simulation_results:
                 st.subheader("📊 模擬結果摘要")
                 
                 # Prefer showing the user's configured retirement age if present
-                preferred_final_age = getattr(self.investment_config, 'retirement_age', None)
-                if preferred_final_age is not None and preferred_final_age in self.simulation_results:
+                preferred_final_age = retirement_age
+                if preferred_final_age in self.simulation_results:
                     final_age = preferred_final_age
                 else:
                     final_age = max(self.simulation_results.keys())
@@ -2615,29 +2911,8 @@ class StreamlitFIREPlanningTool:
                 # Second row: split two methods into four metric cards (25x age, 25x target, growing annuity age, growing annuity target)
                 try:
                     # Compute targets and first-achievement ages（近似計算）
-                    retirement_age = int(getattr(self.investment_config, 'retirement_age', 65))
-                    life_expectancy = int(getattr(self.investment_config, 'life_expectancy', 85))
-                    inflation = float(getattr(self.investment_config, 'inflation_rate', 0.03) or 0.03)
-                    conservative = float(getattr(self.investment_config, 'conservative_return_rate', 0.03) or 0.03)
-
-                    # 呼叫核心計算模組
-                    player_status = {
-                        'age': getattr(self.player_status, 'age', 25),
-                        'monthly_expense': getattr(self.player_status, 'monthly_expense', 0),
-                    }
-                    
-                    investment_config = {
-                        'retirement_age': retirement_age,
-                        'life_expectancy': life_expectancy,
-                        'inflation_rate': inflation,
-                        'conservative_return_rate': conservative,
-                    }
-                    
-                    result = check_fire_achievement(
-                        self.simulation_results,
-                        player_status,
-                        investment_config
-                    )
+                    # 呼叫核心計算模組（重新整理頁面不重算；本頁的 0 利率以 0.03 代入）
+                    result = self._cached_fire_check(fullsim=True)
 
                     fire_target_traditional = result['fire_target_traditional']
                     fire_target_growing_annuity = result['fire_target_growing']
@@ -2668,11 +2943,8 @@ class StreamlitFIREPlanningTool:
                 except Exception as e:
                     # Fallback: show simple 25x metrics if calculation module unavailable
                     fire_target = self.player_status.monthly_expense * 12 * 25
-                    fire_age = "未達成"
-                    for age, data in sorted(self.simulation_results.items()):
-                        if data['net_worth'] >= fire_target:
-                            fire_age = f"{age}歲"
-                            break
+                    first_age = self._fire_age_25x()
+                    fire_age = f"{first_age}歲" if first_age is not None else "未達成"
                     c1, c2, c3, c4 = st.columns(4)
                     with c1:
                         st.metric("4%法則 - 達成年齡", fire_age)
@@ -2715,37 +2987,9 @@ class StreamlitFIREPlanningTool:
             st.subheader("操作已移至主棋盤工具列")
             # Note: navigation is available via the left sidebar '回到主棋盤' button.
 
-            # Provide a session-flag driven restart option here as well (in case user navigates from sidebar)
+            # Provide a restart option here as well (in case user navigates from sidebar)
             if st.button("🔄 重新開始（側欄）", key="sidebar_restart_quick"):
-                # toggle confirmation from the sidebar as well
-                st.session_state['confirm_restart'] = not st.session_state.get('confirm_restart', False)
-
-            if st.session_state.get('confirm_restart'):
-                st.warning("此操作將重置所有設定到初始狀態（側欄）")
-                if st.button("確認重新開始（側欄）", key="sidebar_confirm_restart", type="secondary"):
-                    try:
-                        self._reset_session_preserve_params()
-                    except Exception:
-                        try:
-                            self.log_event("重新開始(側欄)時重置 session 失敗")
-                        except Exception:
-                            pass
-
-                    # clear confirmation flag
-                    try:
-                        st.session_state.pop('confirm_restart', None)
-                    except Exception:
-                        pass
-
-                    st.success("✅ 工具已重新開始 (側欄)")
-                    try:
-                        st.session_state['just_restarted'] = True
-                    except Exception:
-                        pass
-                    try:
-                        self.safe_rerun()
-                    except Exception:
-                        pass
+                self._confirm_restart_dialog()
         
         elif action == "❓ 使用說明":
             st.subheader("❓ FIRE理財規劃工具使用說明")
@@ -2,10 +2,14 @@
 FIRE計算器 - 資料模型
 包含所有的資料類別和配置
 """
+import sys
 from dataclasses import dataclass, field
 from typing import List, Optional
 
-@dataclass
+# __slots__ dataclasses (Python 3.10+): no per-instance __dict__, faster attribute access
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_SLOTS)
 class PlayerStatus:
     """玩家狀態"""
     age: int = 25  # 當前年齡
@@ -82,11 +86,10 @@ class PlayerStatus:
         # 2. real_estate_investment 僅用於圖表顯示，不計入淨資產
         return self.savings + self.stock_investment + self.bond_investment + self.cash_investment
     
-    @property
-    def net_worth(self):
-        return self.total_assets
+    # 同一個 property 物件：讀取 net_worth 不需再經過 total_assets 的第二次 property 呼叫
+    net_worth = total_assets
 
-@dataclass
+@dataclass(**_SLOTS)
 class SalaryConfig:
     """薪資成長配置"""
     # 薪資成長率 (年度調整)
@@ -110,7 +113,7 @@ class SalaryConfig:
         else:
             return 0.0  # 56歲後不再調薪
 
-@dataclass
+@dataclass(**_SLOTS)
 class InvestmentConfig:
     """投資配置設定"""
     # 投資比例配置
@@ -145,7 +148,7 @@ class InvestmentConfig:
     growth_return_rate: float = 0.07  # 成長型年報酬率
     conservative_return_rate: float = 0.05  # 保守型年報酬率（修正為5%，用於成長年金現值折現）
 
-@dataclass
+@dataclass(**_SLOTS)
 class MonthlyFinancialResult:
     """月度財務結果"""
     age: int = 0
@@ -11,10 +11,18 @@ import os
 import sys
 import importlib.util
 
-# Configure matplotlib for Chinese font support
-try:
-    import matplotlib.pyplot as plt
-    import matplotlib.font_manager as fm
+# Configure matplotlib for Chinese font support.
+# Streamlit re-executes this script on every interaction; cache_resource keeps the
+# font scan (and the matplotlib import) to once per process.
+@st.cache_resource(show_spinner=False)
+def _select_chinese_font():
+    """Pick a CJK-capable font, apply it to matplotlib and return its name (None without matplotlib)."""
+    try:
+        import matplotlib.pyplot as plt
+        import matplotlib.font_manager as fm
+    except ImportError:
+        # matplotlib not available, skip font configuration
+        return None
 
     # Set Chinese font for matplotlib
     candidates = [
@@ -37,10 +45,9 @@ try:
     else:
         # Fallback to system default
         plt.rcParams['font.family'] = 'sans-serif'
+    return chosen
 
-except ImportError:
-    # matplotlib not available, skip font configuration
-    pass
+_select_chinese_font()
 
 # Robustly load the canonical implementation from core_private to avoid
 # circular imports when this launcher is executed from the `frontend/` dir
@@ -1,41 +1,65 @@
 """Launcher (entry) for Streamlit front-end.
 
-This launcher avoids Python import name collisions by explicitly loading
-the top-level `fire_streamlit.py` file from the repository root using
-importlib when available. That prevents accidentally importing
-`frontend/fire_streamlit.py` (which would cause circular import).
+This launcher imports the canonical implementation
+`core_private.fire_streamlit` with a normal import, so Streamlit reruns reuse
+the module cached in sys.modules. Loading a top-level `fire_streamlit.py`
+by path (importlib) is kept only as a fallback; that avoids accidentally
+importing `frontend/fire_streamlit.py` (which would cause circular import).
 """
 
 import os
+import sys
 import streamlit as st
 import importlib.util
 
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+_ROOT_MODULE_NAME = 'fire_streamlit_root'
+
 
 def load_root_fire_streamlit():
     """Load the repo-root fire_streamlit.py by path and return the module.
 
-    Returns the loaded module or None if not available.
+    Returns the loaded module or None if not available. The module is
+    registered in sys.modules, so later reruns reuse it instead of
+    executing the file again.
     """
-    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    candidate = os.path.join(repo_root, 'fire_streamlit.py')
+    module = sys.modules.get(_ROOT_MODULE_NAME)
+    if module is not None:
+        return module
+
+    candidate = os.path.join(_REPO_ROOT, 'fire_streamlit.py')
     if not os.path.exists(candidate):
         return None
 
-    spec = importlib.util.spec_from_file_location('fire_streamlit_root', candidate)
+    spec = importlib.util.spec_from_file_location(_ROOT_MODULE_NAME, candidate)
     if spec is None or spec.loader is None:
         return None
 
     module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
+    sys.modules[_ROOT_MODULE_NAME] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        sys.modules.pop(_ROOT_MODULE_NAME, None)
+        raise
     return module
 
 
 def import_streamlit_tool():
     """Import and return StreamlitFIREPlanningTool class.
 
-    Tries to load the repo-root `fire_streamlit.py` first, then falls back
-    to a normal import if that fails.
+    Imports `core_private.fire_streamlit` first; if that is unavailable,
+    loads the repo-root `fire_streamlit.py`, then falls back to a plain
+    `fire_streamlit` import.
     """
+    if _REPO_ROOT not in sys.path:
+        sys.path.insert(0, _REPO_ROOT)
+    try:
+        from core_private.fire_streamlit import StreamlitFIREPlanningTool
+        return StreamlitFIREPlanningTool
+    except ImportError:
+        pass
+
     mod = load_root_fire_streamlit()
     if mod is not None and hasattr(mod, 'StreamlitFIREPlanningTool'):
         return getattr(mod, 'StreamlitFIREPlanningTool')
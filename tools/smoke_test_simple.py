@@ -1,77 +1,180 @@
 import sys, os
+import functools
+import numpy as np
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from backend.core.simulation import run_simulation
-
-# 用戶的測試案例：25歲，月入30000，月消費25000，全放現金，現金報酬0%，通膨3%，調薪5%，退休65歲
-payload = {
-    "player_status": {
-        "age": 25,
-        "monthly_income": 30000,
-        "monthly_expense": 25000,
-        "savings": 0,
-        "debt": 0,
-    },
-    "investment_config": {
-        "retirement_age": 65,
-        "life_expectancy": 85,
-        "inflation_rate": 0.03,
-        "young_growth_ratio": 0.0,  # 全放現金
-        "young_conservative_ratio": 0.0,
-        "young_cash_reserve_ratio": 1.0,
-        "middle_growth_ratio": 0.0,
-        "middle_conservative_ratio": 0.0,
-        "middle_cash_reserve_ratio": 1.0,
-        "old_growth_ratio": 0.0,
-        "old_conservative_ratio": 0.0,
-        "old_cash_reserve_ratio": 1.0,
-        "growth_return_rate": 0.07,
-        "conservative_return_rate": 0.03,
-        "cash_return": 0.0,  # 現金報酬0%
-    },
-    "salary_config": {
-        "young_growth_rate": 0.05,  # 調薪5%
-        "middle_growth_rate": 0.02,
-        "senior_decline_rate": 0.1,
-        "young_age_limit": 35,
-        "middle_age_limit": 50,
-        "decline_age": 55,
-    },
-    "life_planning": {},
-}
-
-result = run_simulation(payload)
-sim = result["simulation_results"]
-
-retirement_age = payload["investment_config"]["retirement_age"]
-if retirement_age in sim:
-    data = sim[retirement_age]
-    print(f"退休年齡: {retirement_age}")
-    print(f"股票: {data.get('stock_investment', 0):,.0f}")
-    print(f"債券: {data.get('bond_investment', 0):,.0f}")
-    print(f"現金: {data.get('cash_investment', 0):,.0f}")
-    print(f"淨資產: {data.get('net_worth', 0):,.0f}")
-    print(f"每月收入: {data.get('monthly_income', 0):,.0f}")
-    print(f"每月支出: {data.get('monthly_expense', 0):,.0f}")
-else:
-    print(f"找不到退休年齡 {retirement_age} 的資產分布，可用年齡: {list(sim.keys())}")
-
-# 手動計算驗證
-print("\n手動計算驗證:")
-age = 25
-monthly_income = 30000
-monthly_expense = 25000
-inflation = 0.03
-salary_growth = 0.05
-cash_return = 0.0
-total_savings = 0
-for year in range(40):  # 25 to 65
-    monthly_savings = monthly_income - monthly_expense
-    annual_savings = monthly_savings * 12
-    total_savings += annual_savings
-    total_savings *= (1 + cash_return)  # 年複利，但現金0%
-    monthly_income *= (1 + salary_growth)
-    monthly_expense *= (1 + inflation)
-    if year < 5:
-        print(f"年 {year+1}: 月收入 {monthly_income:,.0f}, 月支出 {monthly_expense:,.0f}, 年儲蓄 {annual_savings:,.0f}, 累積 {total_savings:,.0f}")
-
-print(f"最終累積: {total_savings:,.0f}")
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba 為選用套件；未安裝時以純 Python 執行
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda f: f
+    prange = range
+
+
+def growing_annuity_fv(payment, growth, rate, n):
+    """成長年金終值：sum_{k<n} payment*(1+growth)^k*(1+rate)^(n-k)（每年先存入再複利一年）。
+
+    `n` 可為整數或 NumPy 陣列。
+    """
+    if growth == rate:
+        return payment * n * (1 + rate) ** n
+    return payment * (1 + rate) * ((1 + growth) ** n - (1 + rate) ** n) / (growth - rate)
+
+
+@njit(cache=True)
+def simulate_cash(n, income, expense, income_growth, inflation, cash_return):
+    """逐年迴圈版本（有 numba 時編譯為原生碼），用來交叉驗證成長年金公式與做基準測試。"""
+    # 迴圈不變量先算好
+    cash_mul = 1 + cash_return
+    income_mul = 1 + income_growth
+    expense_mul = 1 + inflation
+    total = 0.0
+    for _ in range(n):
+        total += (income - expense) * 12
+        total *= cash_mul
+        income *= income_mul
+        expense *= expense_mul
+    return total
+
+
+@njit(parallel=True, cache=True)
+def sweep_cash(growths, inflations, cash_returns, n, income, expense):
+    """對多組 (調薪率, 通膨率, 現金報酬) 計算 simulate_cash 的最終累積；有 numba 時以 prange 平行執行。"""
+    out = np.empty(len(growths))
+    for k in prange(len(growths)):
+        out[k] = simulate_cash(n, income, expense, growths[k], inflations[k], cash_returns[k])
+    return out
+
+
+def _freeze(obj):
+    """把 payload（dict/list 巢狀）轉成可雜湊的 tuple，保留 key 的型別與順序。
+
+    葉節點連同型別一起存：0、0.0、False 彼此相等、雜湊相同，只存值會被當成同一個快取 key。
+    """
+    if isinstance(obj, dict):
+        return ('dict', tuple((_freeze(k), _freeze(v)) for k, v in obj.items()))
+    if isinstance(obj, list):
+        return ('list', tuple(_freeze(v) for v in obj))
+    return (type(obj), obj)
+
+
+def _thaw(key):
+    tag, value = key
+    if tag == 'dict':
+        return {_thaw(k): _thaw(v) for k, v in value}
+    if tag == 'list':
+        return [_thaw(v) for v in value]
+    return value
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_simulation(payload_key):
+    # 延遲載入：import 此模組（分析工具、測試探索）時不會跑模擬
+    from backend.core.simulation import run_simulation
+    return run_simulation(_thaw(payload_key))
+
+
+def simulate(payload):
+    """run_simulation(payload)，相同 payload 直接回傳快取結果（結果為共用物件，請勿修改）。"""
+    return _cached_simulation(_freeze(payload))
+
+
+def main():
+    # 用戶的測試案例：25歲，月入30000，月消費25000，全放現金，現金報酬0%，通膨3%，調薪5%，退休65歲
+    payload = {
+        "player_status": {
+            "age": 25,
+            "monthly_income": 30000,
+            "monthly_expense": 25000,
+            "savings": 0,
+            "debt": 0,
+        },
+        "investment_config": {
+            "retirement_age": 65,
+            "life_expectancy": 85,
+            "inflation_rate": 0.03,
+            "young_growth_ratio": 0.0,  # 全放現金
+            "young_conservative_ratio": 0.0,
+            "young_cash_reserve_ratio": 1.0,
+            "middle_growth_ratio": 0.0,
+            "middle_conservative_ratio": 0.0,
+            "middle_cash_reserve_ratio": 1.0,
+            "old_growth_ratio": 0.0,
+            "old_conservative_ratio": 0.0,
+            "old_cash_reserve_ratio": 1.0,
+            "growth_return_rate": 0.07,
+            "conservative_return_rate": 0.03,
+            "cash_return": 0.0,  # 現金報酬0%
+        },
+        "salary_config": {
+            "young_growth_rate": 0.05,  # 調薪5%
+            "middle_growth_rate": 0.02,
+            "senior_decline_rate": 0.1,
+            "young_age_limit": 35,
+            "middle_age_limit": 50,
+            "decline_age": 55,
+        },
+        "life_planning": {},
+    }
+
+    result = simulate(payload)
+    sim = result["simulation_results"]
+
+    ic = payload["investment_config"]
+    retirement_age = ic["retirement_age"]
+    data = sim.get(retirement_age)
+    if data is not None:
+        get = data.get
+        print(f"退休年齡: {retirement_age}")
+        print(f"股票: {get('stock_investment', 0):,.0f}")
+        print(f"債券: {get('bond_investment', 0):,.0f}")
+        print(f"現金: {get('cash_investment', 0):,.0f}")
+        print(f"淨資產: {get('net_worth', 0):,.0f}")
+        print(f"每月收入: {get('monthly_income', 0):,.0f}")
+        print(f"每月支出: {get('monthly_expense', 0):,.0f}")
+    else:
+        print(f"找不到退休年齡 {retirement_age} 的資產分布，可用年齡: {list(sim)}")
+
+    # 手動計算驗證
+    print("\n手動計算驗證:")
+    monthly_income = 30000
+    monthly_expense = 25000
+    inflation = 0.03
+    salary_growth = 0.05
+    cash_return = 0.0
+    years = 40  # 25 to 65
+    # 年儲蓄 = 12*(月收入 - 月支出)，兩者皆為等比數列，故累積為兩個成長年金終值之差
+    total_savings = (growing_annuity_fv(12 * monthly_income, salary_growth, cash_return, years)
+                     - growing_annuity_fv(12 * monthly_expense, inflation, cash_return, years))
+    loop_total = simulate_cash(years, float(monthly_income), float(monthly_expense),
+                               salary_growth, inflation, cash_return)
+    assert abs(loop_total - total_savings) <= 1e-9 * abs(total_savings), (loop_total, total_savings)
+
+    # 前5年明細：直接代入年數 k，不需逐年迴圈
+    # income_path[k]/expense_path[k] = 第 k 年初的月收入/月支出 (k = 0..5)，各只算一次次方
+    k = np.arange(6)
+    income_path = monthly_income * np.power(1 + salary_growth, k)
+    expense_path = monthly_expense * np.power(1 + inflation, k)
+    income, expense = income_path[1:], expense_path[1:]  # 調整後（年末）
+    annual_savings = 12 * (income_path[:-1] - expense_path[:-1])
+    cumulative = (growing_annuity_fv(12 * monthly_income, salary_growth, cash_return, k[1:])
+                  - growing_annuity_fv(12 * monthly_expense, inflation, cash_return, k[1:]))
+    print("\n".join(
+        f"年 {year+1}: 月收入 {income[year]:,.0f}, 月支出 {expense[year]:,.0f}, 年儲蓄 {annual_savings[year]:,.0f}, 累積 {cumulative[year]:,.0f}"
+        for year in range(5)
+    ))
+
+    # 調薪率敏感度：其餘參數固定，掃描 2%~8%
+    growth_grid = np.linspace(0.02, 0.08, 7)
+    sweep = sweep_cash(growth_grid, np.full_like(growth_grid, inflation), np.full_like(growth_grid, cash_return),
+                       years, float(monthly_income), float(monthly_expense))
+    print("\n調薪率敏感度:")
+    print("\n".join(f"調薪 {g:.0%}: 最終累積 {v:,.0f}" for g, v in zip(growth_grid, sweep)))
+
+    print(f"最終累積: {total_savings:,.0f}")
+
+
+if __name__ == "__main__":
+    main()